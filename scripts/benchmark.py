@@ -1,31 +1,82 @@
 #!/usr/bin/env python3
 
 import argparse
+import dataclasses
 
-from typing import List
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set
 
 import config
 import lib.util as util
+import lib.threads as threads
+import lib.tenancy as tenancy
+import lib.workqueue as workqueue
+import lib.numa as numa
+import lib.page_cache as page_cache
 
 from lib.algorithm import AlgorithmName
 from lib.tool import ToolName
 from lib.dataset import Dataset
-from lib.benchmark_summary import BenchmarkSummary, OutputFormat, ResultsPrinter
-from drivers.driver_graphblast import DriverGraphBLAST
-from drivers.driver_gunrock import DriverGunrock
-from drivers.driver_lagraph import DriverLaGraph
-from drivers.driver_spla import DriverSpla
+from lib.benchmark_summary import BenchmarkSummary, OutputFormat, ResultsPrinter, make_output_dir
+from lib.journal import CellKey, Journal, JournalEntry
+from lib.scheduler import Cell, Scheduler
+from lib.interleave import Interleaver
+from lib.planner import Planner, load_history, parse_duration, print_plan
+from drivers.registry import get_driver
 from drivers.driver import Driver
 
 
-def tool_to_driver(tool: ToolName) -> Driver:
-    drivers = {
-        ToolName.spla: lambda _: DriverSpla(),
-        ToolName.lagraph: lambda _: DriverLaGraph(),
-        ToolName.gunrock: lambda _: DriverGunrock(),
-        ToolName.graphblast: lambda _: DriverGraphBLAST(),
-    }
-    return drivers[tool](None)
+def make_cells(drivers: List[Driver],
+               algorithms: List[AlgorithmName],
+               finished: Set[CellKey],
+               threads_sweep: Optional[List[int]] = None,
+               placements: Optional[List[numa.Placement]] = None) -> Iterator[Cell]:
+    def print_status(status: str, *args):
+        util.print_status('benchmark', status, *args)
+
+    for dataset_name in config.BENCHMARK_DATASETS:
+        print_status(f'dataset {dataset_name}', 'start preparation')
+        dataset = Dataset(dataset_name)
+        print_status(f'dataset {dataset_name}', 'finish preparation')
+
+        for algo in algorithms:
+            status_algo_dataset = f'algo: {algo}, dataset: {dataset.name}'
+
+            print_status(status_algo_dataset,
+                         'check which tools can be used')
+
+            # Not every tool implements every algorithm (e.g. cc):
+            # the algorithm is compared on the tools, which can run it
+            runnable = list(filter(lambda driver: driver.can_run(dataset, algo), drivers))
+
+            if not runnable:
+                print_status(status_algo_dataset,
+                             f'not runnable on any driver, skipping')
+                continue
+            if len(runnable) < len(drivers):
+                skipped = ', '.join(str(d.tool_name()) for d in drivers if d not in runnable)
+                print_status(status_algo_dataset, f'not runnable on {skipped}, skipping them')
+
+            for driver in runnable:
+                tool = driver.tool_name()
+                cells = [Cell(dataset, algo, driver, config.TOOL_CONFIG[tool].cores)]
+                if threads_sweep is not None:
+                    # Threads are pinned to the same number of cpus
+                    cells = [Cell(dataset, algo, driver,
+                                  cores=n,
+                                  variant=threads.threads_variant(n),
+                                  env=threads.threads_env(tool, n),
+                                  threads=n) for n in threads_sweep]
+                if placements:
+                    cells = [dataclasses.replace(cell,
+                                                 variant=','.join(filter(None, [cell.variant, placement.variant()])),
+                                                 wrapper=placement.command())
+                             for cell in cells for placement in placements]
+                for cell in cells:
+                    if (algo, dataset.name, tool, cell.variant) in finished:
+                        print_status(str(cell), 'already in the journal, skipping')
+                        continue
+                    yield cell
 
 
 def main():
@@ -41,8 +92,13 @@ def main():
                         choices=list(ToolName),
                         help='Select tool to use (otherwise all tools are benchmarked)')
     parser.add_argument('--output',
+                        type=Path,
                         default=config.BENCHMARK_OUTPUT,
                         help='File to dump benchmark results')
+    parser.add_argument('--resume',
+                        type=Path,
+                        metavar='DIR',
+                        help='Resume interrupted benchmarks run from its results directory')
     parser.add_argument('--format',
                         type=OutputFormat,
                         choices=list(OutputFormat),
@@ -53,14 +109,165 @@ def main():
                         choices=list(ResultsPrinter),
                         default=ResultsPrinter.all,
                         help='Measurement printer')
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=1,
+                        help='Maximal number of benchmark cells to run concurrently, each on its own cpus')
+    parser.add_argument('--adaptive',
+                        action='store_true',
+                        default=config.ADAPTIVE.enabled,
+                        help='Run batches of iterations until the confidence interval of the median reaches the target')
+    parser.add_argument('--target-ci',
+                        type=float,
+                        default=config.ADAPTIVE.target_rel_ci,
+                        help='Target width of the median confidence interval, relative to the median (with --adaptive)')
+
+    parser.add_argument('--sources',
+                        type=int,
+                        default=config.WORKLOAD.sources,
+                        help='Run bfs and sssp from this number of sampled sources and report latency distribution')
+    parser.add_argument('--sources-seed',
+                        type=int,
+                        default=config.WORKLOAD.seed,
+                        help='Seed of the sources sampler')
+    parser.add_argument('--degree-weighted',
+                        action='store_true',
+                        default=config.WORKLOAD.degree_weighted,
+                        help='Sample sources proportionally to their out-degree')
+    parser.add_argument('--giant-only',
+                        action='store_true',
+                        default=config.WORKLOAD.giant_only,
+                        help='Sample sources from the largest connected component only')
+    parser.add_argument('--convert',
+                        action='store_true',
+                        default=config.CONVERSION.enabled,
+                        help='Pass the datasets to the tools in their native input formats (converted once and cached)')
+    parser.add_argument('--verify',
+                        action='store_true',
+                        default=config.VERIFICATION.enabled,
+                        help='Check the saved outputs of the tools against the cached reference after every benchmark')
+    parser.add_argument('--damping',
+                        type=float,
+                        default=config.PAGERANK.damping,
+                        help='Damping factor of pagerank, passed to every tool')
+    parser.add_argument('--pr-tolerance',
+                        type=float,
+                        default=config.PAGERANK.tolerance,
+                        help='Pagerank stops, when the rank of every vertex changes by less than this tolerance')
+    parser.add_argument('--pr-max-iterations',
+                        type=int,
+                        default=config.PAGERANK.max_iterations,
+                        help='Maximal number of pagerank iterations')
+    parser.add_argument('--source-policy',
+                        type=config.SourcePolicy,
+                        choices=list(config.SourcePolicy),
+                        default=config.SOURCE_POLICY,
+                        help='How to choose the source vertex for bfs and sssp')
+    parser.add_argument('--warm-up',
+                        type=config.WarmUpPolicy,
+                        choices=list(config.WarmUpPolicy),
+                        default=config.WARM_UP.policy,
+                        help='Which measured iterations of every launch to discard as the warm-up')
+    parser.add_argument('--discard',
+                        type=int,
+                        default=config.WARM_UP.discard,
+                        help='Number of discarded iterations (with --warm-up discard)')
+    parser.add_argument('--cache-mode',
+                        type=config.CacheMode,
+                        choices=list(config.CacheMode),
+                        default=config.CACHE_MODE,
+                        help='Page-cache state of the dataset file before every tool launch')
+    parser.add_argument('--calibrate',
+                        action='store_true',
+                        default=config.CALIBRATION.enabled,
+                        help='Run calibration kernels before and after every benchmark and re-run it if the machine drifted')
+    parser.add_argument('--drift-tolerance',
+                        type=float,
+                        default=config.CALIBRATION.tolerance,
+                        help='Maximal relative drift of the machine during the benchmark (with --calibrate)')
+    parser.add_argument('--max-reruns',
+                        type=int,
+                        default=config.CALIBRATION.max_reruns,
+                        help='Maximal number of re-runs of the drifted benchmark (with --calibrate)')
+    parser.add_argument('--threads',
+                        type=threads.parse_threads,
+                        metavar='N1,N2,...',
+                        help='Run thread-count sweep: measure each tool with every number of threads and report speedup')
+    parser.add_argument('--numa',
+                        type=numa.parse_policies,
+                        metavar='POLICY,...',
+                        help=f'Run NUMA placement sweep with the policies: {", ".join(map(str, numa.NumaPolicy))} (bind is run on every node)')
+    parser.add_argument('--timeout',
+                        type=float,
+                        default=config.LIMITS.timeout,
+                        help='Kill tool launch after this number of seconds and skip its benchmark')
+    parser.add_argument('--memory-limit',
+                        type=int,
+                        default=config.LIMITS.address_space,
+                        help='Limit of the tool virtual memory in bytes (RLIMIT_AS)')
+    parser.add_argument('--cpu-limit',
+                        type=int,
+                        default=config.LIMITS.cpu_time,
+                        help='Limit of the tool CPU time in seconds (RLIMIT_CPU)')
+
+    parser.add_argument('--launches',
+                        type=int,
+                        default=config.LAUNCHES,
+                        help='Launch each tool this number of times and report between-launch and within-launch variance')
+    parser.add_argument('--rounds',
+                        type=int,
+                        help='Split iterations of each benchmark into rounds and run rounds of all tools and algorithms in random order')
+    parser.add_argument('--order-seed',
+                        type=int,
+                        default=0,
+                        help='Seed of the random order of the rounds (with --rounds)')
+    parser.add_argument('--tenants',
+                        type=int,
+                        help='Run this number of instances of each benchmark at once and report throughput and latency inflation')
+    parser.add_argument('--tenant-mix',
+                        action='store_true',
+                        help='Tenants of the same tool and dataset run different algorithms (with --tenants)')
+    parser.add_argument('--serve',
+                        type=workqueue.parse_address,
+                        metavar='HOST:PORT',
+                        help='Serve the benchmarks as jobs to the workers (worker.py) instead of running them locally')
+    parser.add_argument('--budget',
+                        type=parse_duration,
+                        help='Time budget of the campaign (e.g. 4h, 1h30m): choose cells and iterations to fit into it')
+    parser.add_argument('--plan',
+                        action='store_true',
+                        help='Print the schedule with the predicted finish time and exit')
 
     args = parser.parse_args()
 
+    config.ADAPTIVE.enabled = args.adaptive
+    config.ADAPTIVE.target_rel_ci = args.target_ci
+    config.WORKLOAD.sources = args.sources
+    config.WORKLOAD.seed = args.sources_seed
+    config.WORKLOAD.degree_weighted = args.degree_weighted
+    config.WORKLOAD.giant_only = args.giant_only
+    config.SOURCE_POLICY = args.source_policy
+    config.VERIFICATION.enabled = args.verify
+    config.CONVERSION.enabled = args.convert
+    config.PAGERANK.damping = args.damping
+    config.PAGERANK.tolerance = args.pr_tolerance
+    config.PAGERANK.max_iterations = args.pr_max_iterations
+    config.LAUNCHES = args.launches
+    config.WARM_UP.policy = args.warm_up
+    config.CACHE_MODE = args.cache_mode
+    config.CALIBRATION.enabled = args.calibrate
+    config.CALIBRATION.tolerance = args.drift_tolerance
+    config.CALIBRATION.max_reruns = args.max_reruns
+    config.WARM_UP.discard = args.discard
+    config.LIMITS.timeout = args.timeout
+    config.LIMITS.address_space = args.memory_limit
+    config.LIMITS.cpu_time = args.cpu_limit
+
     drivers: List[Driver] = []
     if args.tool is None:
-        drivers = map(tool_to_driver, list(ToolName))
+        drivers = list(map(get_driver, list(ToolName)))
     else:
-        drivers = [tool_to_driver(args.tool)]
+        drivers = [get_driver(args.tool)]
 
     algorithms: List[AlgorithmName] = []
     if args.algo is None:
@@ -68,43 +275,98 @@ def main():
     else:
         algorithms = [args.algo]
 
-    def print_status(status: str, *args):
-        util.print_status('benchmark', status, *args)
-
     summary = BenchmarkSummary()
 
-    try:
-        for dataset_name in config.BENCHMARK_DATASETS:
-            print_status(f'dataset {dataset_name}', 'start preparation')
-            dataset = Dataset(dataset_name)
-            print_status(f'dataset {dataset_name}', 'finish preparation')
+    finished_entries: List[JournalEntry] = []
+    if args.resume is not None:
+        if not args.resume.is_dir():
+            raise Exception(f'Can not resume: `{args.resume}` is not a directory')
+        # Partial results of the aborted cells are measured again
+        finished_entries = [entry for entry in Journal(args.resume).entries()
+                            if not entry.result.partial]
+    for entry in finished_entries:
+        summary.add_measurement(
+            entry.tool, entry.dataset, entry.algo, entry.result, entry.variant)
+    finished = set(map(JournalEntry.key, finished_entries))
 
-            for algo in algorithms:
-                status_algo_dataset = f'algo: {algo}, dataset: {dataset.name}'
+    topology: List[numa.NumaNode] = []
+    placements: List[numa.Placement] = []
+    if args.numa is not None:
+        topology = numa.read_topology()
+        placements = numa.placements(args.numa, topology)
+        if args.jobs > 1 and any(placement.policy == numa.NumaPolicy.bind for placement in placements):
+            # numactl --cpunodebind replaces the exclusive cpus, given to the cell by the scheduler
+            raise Exception('NUMA `bind` placement can not be combined with `--jobs` > 1')
 
-                print_status(status_algo_dataset,
-                             'check if all tools can be used')
-
-                all_can_run = all(map(
-                    lambda driver: driver.can_run(dataset, algo), drivers
-                ))
-
-                if not all_can_run:
-                    print_status(status_algo_dataset,
-                                 f'not runnable on some drivers, skipping')
-                    continue
-
-                print_status(status_algo_dataset, 'start benchmarking')
-                for driver in drivers:
-                    status = f'algo: {algo}, dataset: {dataset.name}, tool: {str(driver.tool_name())}'
-                    print_status(status, 'start benchmarking')
-                    result = driver.run(dataset, algo)
-                    print_status(status, 'finish benchmarking')
-                    summary.add_measurement(
-                        driver.tool_name(), dataset, algo, result)
-                print_status(status_algo_dataset, 'finish benchmarking')
+    cells: Iterable[Cell] = make_cells(
+        drivers, algorithms, finished, args.threads, placements)
+
+    if args.budget is not None or args.plan:
+        if config.ADAPTIVE.enabled:
+            # Planned cells get the number of iterations, which turns the adaptive mode off
+            raise Exception('`--budget` and `--plan` can not be combined with `--adaptive`')
+        plan = Planner(load_history(args.output), args.rounds, args.jobs).plan(list(cells), args.budget)
+        print_plan(plan)
+        if args.plan:
+            return
+        cells = [dataclasses.replace(planned.cell, iterations=planned.iterations)
+                 for planned in plan.cells]
+
+    output = args.resume if args.resume is not None else make_output_dir(args.output)
+    journal = Journal(output)
+    if args.numa is not None:
+        numa.dump_topology(topology, output)
+
+    if args.serve is not None:
+        # The queue of the interrupted campaign is kept, even if the configuration has changed
+        saved_cells = workqueue.load_cells(output) if args.resume is not None else None
+        if saved_cells is None:
+            cells = list(cells)
+            workqueue.save_cells(output, cells)
+        else:
+            cells = [cell for cell in saved_cells
+                     if (cell.algo, cell.dataset.name, cell.driver.tool_name(), cell.variant) not in finished]
+
+    def add_measurement(cell: Cell, result):
+        summary.add_measurement(
+            cell.driver.tool_name(), cell.dataset.name, cell.algo, result, cell.variant)
+        journal.append(JournalEntry(
+            cell.algo, cell.dataset.name, cell.driver.tool_name(), result, cell.variant))
+
+    on_result = add_measurement
+    on_skip = None
+    if args.rounds is not None:
+        interleaver = Interleaver(args.rounds, args.order_seed)
+        cells = interleaver.cells(cells)
+        on_result = interleaver.collector(add_measurement)
+        on_skip = interleaver.failure_collector(add_measurement)
+
+    if args.tenants is not None:
+        tenancy_results: List[tenancy.TenancyResult] = []
+
+        def add_tenancy_result(result: tenancy.TenancyResult):
+            tenancy_results.append(result)
+            for index, cell in enumerate(result.cells):
+                add_measurement(cell, result.isolated[index])
+                add_measurement(dataclasses.replace(cell, variant=tenancy.tenants_variant(cell, result.tenants)),
+                                result.concurrent_result(index))
+
+        try:
+            tenancy.run(cells, args.tenants, args.tenant_mix, add_tenancy_result)
+        finally:
+            summary.dump(args.format, output, args.printer)
+            tenancy.dump(tenancy_results, output)
+            page_cache.remove_staged()
+        return
+
+    try:
+        if args.serve is not None:
+            workqueue.Coordinator(args.serve).run(cells, on_result, on_skip)
+        else:
+            Scheduler(args.jobs).run(cells, on_result, on_skip)
     finally:
-        summary.dump(args.format, args.output, args.printer)
+        summary.dump(args.format, output, args.printer)
+        page_cache.remove_staged()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import argparse
+
+import config
+
+from lib.algorithm import AlgorithmName
+from lib.dataset import Dataset
+from lib.tool import ToolName
+from lib.regression import Bisection
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find the first commit of the tool, which makes the benchmark slower')
+
+    parser.add_argument('tool',
+                        type=ToolName,
+                        choices=list(ToolName),
+                        help='Tool to bisect (its sources must be a git repository)')
+    parser.add_argument('good',
+                        help='Git ref of the tool without the regression')
+    parser.add_argument('bad',
+                        help='Git ref of the tool with the regression')
+    parser.add_argument('--dataset',
+                        required=True,
+                        help='Dataset of the benchmark')
+    parser.add_argument('--algo',
+                        type=AlgorithmName,
+                        choices=list(AlgorithmName),
+                        required=True,
+                        help='Algorithm of the benchmark')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=config.BISECT.threshold,
+                        help='Commit is bad, if its median time exceeds the good one by this fraction')
+    parser.add_argument('--max-rounds',
+                        type=int,
+                        default=config.BISECT.max_rounds,
+                        help='Maximal number of measurement rounds of a single commit')
+    parser.add_argument('--adaptive',
+                        action='store_true',
+                        default=config.ADAPTIVE.enabled,
+                        help='Run every round until the confidence interval of the median reaches the target')
+
+    args = parser.parse_args()
+
+    config.BISECT.threshold = args.threshold
+    config.BISECT.max_rounds = args.max_rounds
+    config.ADAPTIVE.enabled = args.adaptive
+
+    bisection = Bisection(args.tool, Dataset(args.dataset), args.algo, args.threshold)
+    first_bad = bisection.run(args.good, args.bad)
+    bisection.print_report(first_bad)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ from build.graphblast import build as build_graphblast
 from build.gunrock import build as build_gunrock
 from build.lagraph import build as build_lagraph
 from build.spla import build as build_spla
+from build.scipy import build as build_scipy
 from lib.tool import ToolName
 from lib.util import check_paths_exist
 
@@ -16,7 +17,8 @@ TOOL_BUILDERS = {
     ToolName.graphblast: build_graphblast,
     ToolName.gunrock: build_gunrock,
     ToolName.lagraph: build_lagraph,
-    ToolName.spla: build_spla
+    ToolName.spla: build_spla,
+    ToolName.scipy: build_scipy
 }
 
 
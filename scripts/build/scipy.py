@@ -0,0 +1,6 @@
+import lib.reference as reference
+
+
+def build():
+    # Reference tool is not compiled: only its dependencies are checked
+    reference.require()
@@ -1,7 +1,7 @@
 import platform
 import os
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
 from types import SimpleNamespace as Namespace
@@ -57,6 +57,17 @@ class ToolConfigurations:
     # Other configurations of the tool
     config: Namespace
 
+    # Number of cpus, required by a single run of the tool.
+    # None means the run needs the whole machine and is never
+    # executed concurrently with other runs.
+    # [MUTABLE]
+    cores: Optional[int] = None
+
+    # Tool-specific environment variables, which set the number of threads
+    # (in addition to the THREADS_ENV)
+    # [MUTABLE]
+    threads_env: List[str] = field(default_factory=list)
+
     def algo_exec_paths(self) -> List[Path]:
         paths = []
         for exec in self.algo_rel.values():
@@ -100,9 +111,13 @@ TOOL_CONFIG: Dict[ToolName, ToolConfigurations] = {
         algo_rel={
             AlgorithmName.bfs:  Path('sources') / 'benchmark' / 'bfs_demo',
             AlgorithmName.sssp: Path('sources') / 'benchmark' / 'sssp_demo',
-            AlgorithmName.tc:   Path('sources') / 'benchmark' / 'tc_demo'
+            AlgorithmName.tc:   Path('sources') / 'benchmark' / 'tc_demo',
+            AlgorithmName.cc:   Path('sources') / 'benchmark' / 'cc_demo'
         },
-        config=Namespace()
+        config=Namespace(
+            # Converter of the Matrix Market files to the serialized GraphBLAS matrices
+            mtx2bin=Path('sources') / 'benchmark' / 'mtx2bin_demo'
+        )
     ),
 
     ToolName.spla: ToolConfigurations(
@@ -126,12 +141,14 @@ TOOL_CONFIG: Dict[ToolName, ToolConfigurations] = {
         },
         config=Namespace(
             # 0: do not display per iteration timing, 1: display per iteration timing
+            # (per iteration times are measured only with 1, otherwise the mean `tight` time is repeated)
             # [MUTABLE]
-            timing=0,
+            timing=1,
 
-            # False: run CPU verification, True: skip CPU algorithm verification
+            # False: run CPU verification, True: skip CPU algorithm verification,
+            # None: skip it when the offline verification is enabled (see VERIFICATION)
             # [MUTABLE]
-            skip_cpu_verify=False
+            skip_cpu_verify=None
         )
     ),
 
@@ -142,6 +159,8 @@ TOOL_CONFIG: Dict[ToolName, ToolConfigurations] = {
             AlgorithmName.bfs:  Path('') / 'bin' / 'bfs',
             AlgorithmName.sssp: Path('') / 'bin' / 'sssp',
             AlgorithmName.tc:   Path('') / 'bin' / 'gtc',
+            AlgorithmName.cc:   Path('') / 'bin' / 'cc',
+            AlgorithmName.pagerank: Path('') / 'bin' / 'pr',
         },
         config=Namespace(
             # Autodetect target architecture
@@ -152,6 +171,16 @@ TOOL_CONFIG: Dict[ToolName, ToolConfigurations] = {
             # [MUTABLE]
             gencode=SmArchitecture.SM61
         )
+    ),
+
+    # Reference implementations on SciPy (scripts/reference_tool.py): nothing is built
+    ToolName.scipy: ToolConfigurations(
+        sources=ROOT / 'scripts',
+        build=ROOT / 'scripts',
+        algo_rel={},
+        config=Namespace(),
+        # SciPy sparse kernels are single-threaded
+        cores=1
     )
 }
 
@@ -237,6 +266,16 @@ SUITESPARSE = Namespace(
 )
 
 
+"""
+Environment variables, which set the number of threads of every tool
+in the thread-count sweep
+
+[MUTABLE]
+
+"""
+THREADS_ENV = ['OMP_NUM_THREADS', 'GRAPHBLAS_NTHREADS']
+
+
 """
 Build configurations
 """
@@ -299,6 +338,200 @@ class DatasetSize(Enum):
         raise Exception(f'Can not get largeness category of {n_edges} edges')
 
 
+"""
+Adaptive number of iterations
+
+[MUTABLE]
+
+If enabled, the number of iterations is not taken from the DatasetSize.
+Instead, the tool is launched with batches of iterations until the
+relative width of the median confidence interval drops below the target,
+or until one of the caps is hit.
+
+"""
+ADAPTIVE = Namespace(
+    enabled=False,
+
+    # Target width of the confidence interval of the median, relative to the median
+    target_rel_ci=0.05,
+
+    # Confidence level of the interval
+    confidence=0.95,
+
+    # Number of iterations in a single tool launch
+    batch=5,
+
+    # Maximal total number of iterations
+    max_iterations=200,
+
+    # Maximal time of the measurement in seconds (None to disable)
+    max_time=600
+)
+
+
+"""
+Number of separate tool launches per benchmark
+
+[MUTABLE]
+
+Each launch runs the full number of iterations. Several launches capture
+the launch-to-launch variance (allocation layout, ASLR, JIT and OpenCL
+compilation), which is reported separately from the within-launch one.
+
+"""
+LAUNCHES = 1
+
+
+class WarmUpPolicy(Enum):
+    """
+    Which of the measured iterations of every tool launch are discarded
+    as the warm-up, in addition to the own warm-up run of the tool
+
+    [MUTABLE]
+    """
+    # Keep all measured iterations
+    tool = 'tool'
+    # Run WARM_UP.discard more iterations and discard the first ones
+    discard = 'discard'
+    # Discard iterations before the steady state, detected by MSER truncation
+    mser = 'mser'
+
+    def __str__(self):
+        return self.value
+
+
+"""
+Warm-up of the tool launch
+
+[MUTABLE]
+
+Not applied to the multi-source workload, where every time is a separate query.
+
+"""
+WARM_UP = Namespace(
+    policy=WarmUpPolicy.tool,
+
+    # Number of discarded iterations (with `discard` policy)
+    discard=1,
+
+    # Size of the batches, which are averaged by MSER (MSER-5 by default)
+    batch=5,
+
+    # Maximal fraction of the iterations, which MSER may discard
+    max_fraction=0.5
+)
+
+
+"""
+Machine calibration
+
+[MUTABLE]
+
+If enabled, short integer, memory-latency and streaming kernels are
+run before and after every benchmark cell, and cpu frequency and load
+average are sampled. If the machine state drifted beyond the tolerance
+during the cell (throttling, background load), the cell is re-run, and
+the last result is flagged with its drift.
+
+"""
+CALIBRATION = Namespace(
+    enabled=False,
+
+    # Maximal relative change of the kernels speed or cpu frequency.
+    # It is raised to noise_factor times the noise floor of the kernels,
+    # measured with noise_samples back-to-back samples at the start,
+    # but never above max_tolerance (calibration is reported unreliable then)
+    tolerance=0.05,
+    noise_factor=3,
+    noise_samples=4,
+    max_tolerance=0.15,
+
+    # Maximal number of re-runs of the drifted cell
+    max_reruns=1,
+
+    # Iterations of the integer kernel
+    integer_ops=200000,
+
+    # Number of elements (4 bytes each) of the memory-latency chain and the accesses to it
+    latency_size=1 << 22,
+    latency_steps=1 << 20,
+
+    # Size of the copied buffer in bytes
+    stream_size=1 << 26
+)
+
+
+"""
+Limits of the single tool launch
+
+[MUTABLE]
+
+Tool, which exceeds timeout, is killed and its benchmark cell is skipped.
+Memory (RLIMIT_AS) and CPU time (RLIMIT_CPU) limits are set in the tool process
+before it starts and are refused on Windows.
+
+"""
+LIMITS = Namespace(
+    # Wall-clock timeout in seconds (None to disable)
+    timeout=None,
+
+    # Maximal size of the virtual memory in bytes (None to disable)
+    address_space=None,
+
+    # Maximal CPU time in seconds (None to disable)
+    cpu_time=None
+)
+
+
+"""
+Performance bisection of the tools
+
+[MUTABLE]
+
+Commits are checked out into the git worktrees of the tool sources,
+which are kept with their builds and reused by the next bisections.
+
+"""
+BISECT = Namespace(
+    # Folder with the worktrees: <worktrees>/<tool>/<commit>
+    worktrees=DEPS / 'bisect',
+
+    # Commit is bad, if its median time exceeds the good one by this fraction
+    threshold=0.05,
+
+    # Confidence level of the median intervals
+    confidence=0.95,
+
+    # Maximal number of measurement rounds of a single commit
+    max_rounds=5
+)
+
+
+"""
+Campaign planner cost model
+
+[MUTABLE]
+
+Runtime of the cell is estimated from the previous results of the same
+tool, algorithm and dataset in the BENCHMARK_OUTPUT folder. If there are
+none, it is estimated from the number of edges of the dataset.
+
+"""
+PLANNER = Namespace(
+    # Constant overhead of the tool launch in seconds
+    launch_time=1.0,
+
+    # Time to load the dataset in seconds per edge
+    load_time_per_edge=2e-7,
+
+    # Time of the single algorithm iteration in seconds per edge
+    iteration_time_per_edge=2e-8,
+
+    # Minimal number of iterations of the planned cell
+    min_iterations=3
+)
+
+
 """
 Path to the file with the supportive information about datasets.
 It includes if dataset is directed or not and what is the value type
@@ -311,6 +544,86 @@ This file is created automatically
 """
 DATASETS_PROPERTIES = DATASET_FOLDER / 'properties.json'
 
+"""
+Path to the folder with the traversal-source indices of the datasets.
+Index holds connected components, out-degrees and the BFS depths of the
+candidate sources, so the meaningful source can be chosen without
+parsing the dataset again.
+
+This folder is created automatically
+
+[MUTABLE]
+
+"""
+DATASETS_INDEX = DATASET_FOLDER / 'index'
+
+"""
+Path to the folder with the cached reference results of the
+offline verification (see VERIFICATION)
+
+This folder is created automatically
+
+[MUTABLE]
+
+"""
+REFERENCES_FOLDER = DATASET_FOLDER / 'reference'
+
+"""
+Path to the folder with the datasets, converted to the native input
+formats of the tools (see CONVERSION)
+
+This folder is created automatically
+
+[MUTABLE]
+
+"""
+CONVERTED_FOLDER = DATASET_FOLDER / 'converted'
+
+"""
+Conversion of the datasets to the native input formats of the tools
+
+[MUTABLE]
+
+If enabled, tools with a faster input format than the Matrix Market text
+(LaGraph: serialized GraphBLAS `.grb`, SciPy: `.npz`) get the converted file.
+It is made once per dataset and cached in CONVERTED_FOLDER; the conversion
+time is reported separately from the benchmark.
+
+"""
+CONVERSION = Namespace(
+    enabled=False
+)
+
+
+class CacheMode(Enum):
+    """
+    State of the dataset file in the page cache before every tool launch
+
+    [MUTABLE]
+    """
+    # Leave as is: depends on the previous benchmarks
+    none = 'none'
+    # Evicted from the page cache with posix_fadvise(DONTNEED)
+    cold = 'cold'
+    # Pre-read and locked in memory (like `vmtouch -l`), if RLIMIT_MEMLOCK allows
+    warm = 'warm'
+    # Copied to STAGING_FOLDER, and the tool reads the copy
+    staged = 'staged'
+
+    def __str__(self):
+        return self.value
+
+
+CACHE_MODE = CacheMode.none
+
+"""
+Memory-backed folder for the staged datasets
+
+[MUTABLE]
+
+"""
+STAGING_FOLDER = Path('/dev/shm') / 'spla-bench'
+
 """
 Urls of the datasets and their names
 You may add more urls to test more tests
@@ -347,6 +660,110 @@ Default source for the path-finding algorithms (bfs, sssp)
 DEFAULT_SOURCE = 0
 
 
+class SourcePolicy(Enum):
+    """
+    How to choose the source for the path-finding algorithms
+
+    [MUTABLE]
+    """
+    # Always use DEFAULT_SOURCE
+    default = 'default'
+    # Vertex of the giant component with the maximal out-degree
+    max_degree = 'max_degree'
+    # Candidate source with the deepest BFS tree
+    deepest = 'deepest'
+
+    def __str__(self):
+        return self.value
+
+
+SOURCE_POLICY = SourcePolicy.default
+
+"""
+Number of candidate sources, for which the BFS depth is computed
+when the traversal-source index is built. Half of them are the
+vertices of the giant component with the highest out-degree,
+the other half are the random vertices of the giant component.
+
+[MUTABLE]
+
+"""
+SOURCE_INDEX_CANDIDATES = 8
+
+
+"""
+Multi-source query workload for the path-finding algorithms (bfs, sssp)
+
+[MUTABLE]
+
+If the number of sources is set, each traversal benchmark runs from
+this number of sampled source vertices instead of the DEFAULT_SOURCE,
+and the per-query latency distribution is reported.
+
+"""
+WORKLOAD = Namespace(
+    # Number of the sampled sources per dataset (None disables the workload mode)
+    sources=None,
+
+    # Seed of the sampler, all tools get the same sources
+    seed=0,
+
+    # Sample vertices proportionally to their out-degree
+    degree_weighted=False,
+
+    # Sample vertices of the largest connected component only
+    giant_only=False,
+
+    # Number of sources, passed to the single launch of the tool (if it accepts many sources)
+    batch=1024
+)
+
+
+"""
+PageRank parameters, passed to every tool
+
+[MUTABLE]
+
+Tools stop at the different points by default, so the parameters are
+explicit. The tool stops when the rank of every vertex changes between two
+iterations by less than the tolerance (the per-vertex threshold of Gunrock),
+or after the maximal number of iterations. Ranks sum up to 1, so the
+tolerance must be well below 1/n of the largest dataset.
+
+"""
+PAGERANK = Namespace(
+    damping=0.85,
+    tolerance=1e-6,
+    max_iterations=100
+)
+
+
+"""
+Offline verification of the tool results
+
+[MUTABLE]
+
+If enabled, tools, which can save their output, save it after the measured
+iterations, and the harness compares it with the reference result after the
+benchmark, outside of the measured time. GraphBLAST skips its own CPU
+verification then, unless its `skip_cpu_verify` is set explicitly.
+
+"""
+VERIFICATION = Namespace(
+    enabled=False,
+
+    # Relative tolerance of the sssp distances
+    rtol=1e-5,
+
+    # Maximal L1 distance between the normalized pagerank ranks and the reference
+    pagerank_l1=1e-3,
+
+    # Convergence of the reference ranks: per-vertex tolerance and maximal iterations
+    pagerank_tolerance=1e-12,
+    pagerank_max_iterations=1000
+)
+
+
 """
 List of the datasets, which will be used for the benchmark
 Name must correspond to the key in the DATASET_URL dictionary,
@@ -1,11 +1,24 @@
 import abc
+import base64
 import statistics
+import subprocess
+import threading
+import time
 
+from array import array
 from pathlib import Path
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, asdict, field
+from enum import Enum
+from typing import Dict, List, Optional, Tuple, Union
 
 import lib.util as util
+import lib.stats as stats
+import lib.process as process
+import lib.page_cache as page_cache
+import lib.sources as sources
+import lib.source_index as source_index
+import lib.verification as verification
+import lib.conversion as conversion
 import config as config
 
 from lib.dataset import Dataset
@@ -14,13 +27,168 @@ from lib.tool import ToolName
 from lib.algorithm import AlgorithmName
 
 
+class Phase(Enum):
+    """
+    Phase of the tool launch
+    """
+    # Reading the dataset file
+    read = 'read'
+    # Constructing the matrix from the file data
+    build = 'build'
+    # Host to device transfer
+    transfer = 'transfer'
+    # Measured iterations (sum of the iteration times)
+    compute = 'compute'
+    # Whole tool process, measured by the harness
+    process = 'process'
+
+    def __str__(self):
+        return self.value
+
+
 @dataclass
 class ExecutionResult:
     """
     Result of the execution of the single algorithm benchmark run
     """
     warm_up: int
-    times: List[int]
+    # Stored compactly, since there may be tens of thousands of query latencies
+    times: Union[List[float], array]
+
+    # Width of the median confidence interval, relative to the median
+    rel_ci: Optional[float] = None
+
+    # Resources, consumed by all launches of the tool
+    usage: Optional[process.ResourceUsage] = None
+
+    # Number of threads, the tool was limited to (None if not limited)
+    threads: Optional[int] = None
+
+    # Wall-clock time of the whole benchmark in seconds, including tool launches
+    wall_time: Optional[float] = None
+
+    # Number of iterations of every separate tool launch (None if all times are from one launch)
+    launches: Optional[List[int]] = None
+
+    # Number of measured iterations, discarded by the warm-up policy
+    discarded: int = 0
+
+    # Page-cache state of the dataset file before every launch
+    cache_mode: Optional[str] = None
+
+    # Largest relative change of the machine calibration during the benchmark
+    drift: Optional[float] = None
+
+    # Machine state before and after the benchmark (see lib.calibration.MachineState)
+    machine: Optional[Dict] = None
+
+    # Tool was killed or failed: times of the iterations, finished before that
+    partial: bool = False
+
+    # Milliseconds of the launch phases, reported by the tool or measured by the
+    # harness, summed over all launches (compute is computed from the times)
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    # Iterations of the algorithm itself until convergence (pagerank), if the tool reports them
+    sweeps: Optional[int] = None
+
+    # Output of the tool matches the reference (None if it was not verified)
+    verified: Optional[bool] = None
+
+    # Input format of the tool, if the dataset was converted from .mtx,
+    # and the seconds of the conversion (done once, not included in the times)
+    input_format: Optional[str] = None
+    conversion_time: Optional[float] = None
+
+    def __post_init__(self):
+        self.times = array('d', self.times)
+
+    def iterations(self) -> int:
+        return len(self.times)
+
+    def launch_sizes(self) -> List[int]:
+        return self.launches if self.launches is not None else [self.iterations()]
+
+    def launch_groups(self) -> List[List[float]]:
+        groups = []
+        offset = 0
+        for size in self.launch_sizes():
+            groups.append(list(self.times[offset:offset + size]))
+            offset += size
+        return groups
+
+    def nested(self, confidence: float = 0.95) -> Optional[stats.NestedStats]:
+        """
+        :return: Between- and within-launch statistics, if there are several launches
+        """
+        return stats.nested_stats(self.launch_groups(), confidence)
+
+    def discard(self, n: int):
+        """
+        Discard first `n` times of the single launch as the warm-up
+        """
+        if n <= 0:
+            return
+        self.discarded += min(n, self.iterations())
+        self.times = self.times[n:]
+
+    def phase_breakdown(self) -> Dict[Phase, float]:
+        """
+        :return: Milliseconds of every known phase per launch
+        """
+        launches = len(self.launch_sizes())
+        breakdown = {Phase(phase): time_ms / launches for phase, time_ms in self.phases.items()}
+        breakdown[Phase.compute] = sum(self.times) / launches
+        return breakdown
+
+    def phases_str(self) -> str:
+        return ', '.join(f'{phase}={time_ms:.2f}ms' for phase, time_ms in self.phase_breakdown().items())
+
+    def time_per_sweep(self) -> Optional[float]:
+        """
+        :return: Median milliseconds of one algorithm iteration, if their number is known
+        """
+        if not self.sweeps:
+            return None
+        return self.median() / self.sweeps
+
+    def update_ci(self, confidence: float):
+        self.rel_ci = stats.relative_median_ci(self.times, confidence)
+
+    @staticmethod
+    def merge(results: List['ExecutionResult']) -> 'ExecutionResult':
+        """
+        Merge results of several launches of the same benchmark
+        """
+        times = array('d')
+        launches = []
+        for result in results:
+            times.extend(result.times)
+            launches.extend(result.launch_sizes())
+        warm_up = statistics.mean(map(lambda r: r.warm_up, results))
+        merged = ExecutionResult(warm_up, times, launches=launches,
+                                 discarded=sum(map(lambda r: r.discarded, results)))
+        merged.usage = process.ResourceUsage.total(
+            [r.usage for r in results if r.usage is not None])
+        wall_times = [r.wall_time for r in results if r.wall_time is not None]
+        merged.wall_time = sum(wall_times) if wall_times else None
+        merged.threads = results[0].threads
+        merged.cache_mode = results[0].cache_mode
+        merged.input_format = results[0].input_format
+        merged.conversion_time = results[0].conversion_time
+        merged.partial = any(map(lambda r: r.partial, results))
+        for result in results:
+            for phase, time_ms in result.phases.items():
+                merged.phases[phase] = merged.phases.get(phase, 0.0) + time_ms
+        sweeps = [r.sweeps for r in results if r.sweeps is not None]
+        merged.sweeps = max(sweeps) if sweeps else None
+        verified = [r.verified for r in results if r.verified is not None]
+        merged.verified = all(verified) if verified else None
+        drifted = [r for r in results if r.drift is not None]
+        if drifted:
+            worst = max(drifted, key=lambda r: r.drift)
+            merged.drift, merged.machine = worst.drift, worst.machine
+        return merged
 
     def avg(self):
         return statistics.mean(self.times)
@@ -31,8 +199,46 @@ class ExecutionResult:
     def stdev(self):
         return statistics.stdev(self.times)
 
+    def to_json(self) -> Dict:
+        times, self.times = self.times, []
+        data = asdict(self)
+        self.times = times
+        data['times'] = base64.b64encode(times.tobytes()).decode('ascii')
+        return data
+
+    @staticmethod
+    def from_json(data: Dict) -> 'ExecutionResult':
+        data = dict(data)
+        if isinstance(data['times'], str):
+            times = array('d')
+            times.frombytes(base64.b64decode(data['times']))
+            data['times'] = times
+        if data.get('usage') is not None:
+            data['usage'] = process.ResourceUsage(**data['usage'])
+        return ExecutionResult(**data)
+
+    def percentile(self, q: float) -> float:
+        return stats.percentile(self.times, q)
+
+    def tail_str(self) -> str:
+        return f'p50={self.percentile(50):.2f}ms, p90={self.percentile(90):.2f}ms, p99={self.percentile(99):.2f}ms, max={max(self.times):.2f}ms, n={self.iterations()}'
+
     def brief_str(self) -> str:
-        return f'warm_up={self.warm_up:.2f}ms, avg={self.avg():.2f}ms, median={self.median():.2f}ms, stdev={self.stdev():.2f}'
+        ci = '' if self.rel_ci is None else f', rel_ci={self.rel_ci:.3f}'
+        usage = '' if self.usage is None else f', {self.usage.brief_str()}'
+        discarded = '' if self.discarded == 0 else f', discarded={self.discarded}'
+        cache = '' if self.cache_mode in (None, 'none') else f', cache={self.cache_mode}'
+        drift = '' if self.drift is None else f', drift={self.drift:.3f}'
+        partial = ', partial' if self.partial else ''
+        phases = '' if not self.phases else f', phases=[{self.phases_str()}]'
+        converted = '' if self.input_format is None else f', input={self.input_format} (converted in {self.conversion_time:.2f}s)'
+        verified = '' if self.verified is None else (', verified' if self.verified else ', wrong result')
+        sweeps = '' if not self.sweeps else f', sweeps={self.sweeps}, per_sweep={self.time_per_sweep():.3f}ms'
+        nested = self.nested()
+        launches = '' if nested is None else (
+            f', launches={nested.launches}, between_sd={nested.between_variance ** 0.5:.2f}'
+            f', within_sd={nested.within_variance ** 0.5:.2f}, ci=[{nested.ci_low:.2f}, {nested.ci_high:.2f}]')
+        return f'warm_up={self.warm_up:.2f}ms, avg={self.avg():.2f}ms, median={self.median():.2f}ms, stdev={self.stdev():.2f}, n={self.iterations()}{discarded}{ci}{launches}{sweeps}{verified}{converted}{cache}{drift}{partial}{phases}{usage}'
 
     def __str__(self) -> str:
         return self.brief_str()
@@ -41,10 +247,96 @@ class ExecutionResult:
         return self.brief_str()
 
 
-class Driver:
-    def __init__(self):
-        self.build()
+class OutputParser:
+    """
+    Incremental parser of the tool output.
+
+    Lines are fed as soon as the tool prints them, and only the parsed
+    numbers are kept, so iterations, finished before the tool is killed,
+    are not lost. Subclasses parse the output format of their tool.
+    """
+
+    # Minimal interval between the live iteration reports in seconds
+    REPORT_INTERVAL = 1.0
+
+    # Lines with the phase times: phase -> (line start, token index, factor to milliseconds)
+    PHASE_LINES: Dict[Phase, Tuple[str, int, float]] = {}
+
+    def __init__(self, tool: ToolName):
+        self.tool = tool
+        self.warm_up = 0.0
+        self.times = array('d')
+        self.phases: Dict[str, float] = {}
+        self.sweeps: Optional[int] = None
+        self.reported = 0.0
+
+    def feed_line(self, line: str):
+        """
+        Parse the phase times of the line (see PHASE_LINES), then the tool-specific part
+        """
+        stripped = line.strip()
+        for phase, (line_start, token, factor) in self.PHASE_LINES.items():
+            if stripped.startswith(line_start):
+                try:
+                    self.add_phase(phase, float(stripped.split()[token]) * factor)
+                except (IndexError, ValueError):
+                    util.print_status(self.tool, 'unexpected phase line', stripped)
+        self.feed(line)
+
+    def feed(self, line: str):
+        pass
+
+    def add_phase(self, phase: Phase, time_ms: float):
+        self.phases[str(phase)] = self.phases.get(str(phase), 0.0) + time_ms
+
+    def add_time(self, time_ms: float):
+        self.times.append(time_ms)
+        now = time.monotonic()
+        if now - self.reported >= OutputParser.REPORT_INTERVAL:
+            self.reported = now
+            util.print_status(self.tool, 'iteration', f'{len(self.times)}: {time_ms:.2f}ms')
+
+    def result(self) -> ExecutionResult:
+        return ExecutionResult(self.warm_up, self.times, phases=dict(self.phases), sweeps=self.sweeps)
 
+    def partial_result(self) -> Optional[ExecutionResult]:
+        """
+        :return: Result of the finished iterations of the aborted run, if any
+        """
+        if len(self.times) == 0:
+            return None
+        result = self.result()
+        result.partial = True
+        return result
+
+
+def add_partial(error: BaseException, results: List[ExecutionResult]):
+    """
+    Merge results of the finished launches into the partial result of the aborted one
+    """
+    partial = getattr(error, 'partial', None)
+    merged = results + ([partial] if partial is not None else [])
+    if merged:
+        error.partial = ExecutionResult.merge(merged)
+        error.partial.partial = True
+
+
+# Algorithms, which start from the source vertex
+TRAVERSAL_ALGORITHMS = [AlgorithmName.bfs, AlgorithmName.sssp]
+
+
+def is_workload(algo: AlgorithmName) -> bool:
+    """
+    :return: True if the algorithm runs the sampled sources of `config.WORKLOAD` instead of the iterations
+    """
+    return config.WORKLOAD.sources is not None and algo in TRAVERSAL_ALGORITHMS
+
+
+# Tools are built one at a time
+_build_lock = threading.Lock()
+
+
+class Driver:
     """
     Base class for any driver, which is responsible for running
     algorithm benchmarks for third-party tools from stand-alone
@@ -54,8 +346,8 @@ class Driver:
         * bfs
         * sssp
         * tc
-        * [future] cc
-        * [future] page rank
+        * cc
+        * pagerank
     """
 
     @abc.abstractmethod
@@ -70,6 +362,14 @@ class Driver:
     def can_run_tc(self, dataset: Dataset) -> bool:
         return False
 
+    @abc.abstractmethod
+    def can_run_cc(self, dataset: Dataset) -> bool:
+        return False
+
+    @abc.abstractmethod
+    def can_run_pagerank(self, dataset: Dataset) -> bool:
+        return False
+
     @abc.abstractmethod
     def run_bfs(self,
                 dataset: Dataset,
@@ -113,6 +413,34 @@ class Driver:
         """
         pass
 
+    @abc.abstractmethod
+    def run_cc(self,
+               dataset: Dataset,
+               num_iterations: int) -> ExecutionResult:
+        """
+        Run cc (connected components) algorithm benchmark.
+        Components of the directed graph are the weakly connected ones.
+
+        :param dataset: Dataset with its properties to run on
+        :param num_iterations: Number of iteration to run
+        :return: execution results
+        """
+        pass
+
+    @abc.abstractmethod
+    def run_pagerank(self,
+                     dataset: Dataset,
+                     num_iterations: int) -> ExecutionResult:
+        """
+        Run pagerank algorithm benchmark with the parameters from `config.PAGERANK`.
+        Parser of the tool sets the number of the pagerank iterations until convergence.
+
+        :param dataset: Dataset with its properties to run on
+        :param num_iterations: Number of iteration to run
+        :return: execution results
+        """
+        pass
+
     @abc.abstractmethod
     def tool_name(self) -> ToolName:
         """
@@ -120,46 +448,286 @@ class Driver:
         """
         pass
 
+    def saves_output(self) -> bool:
+        """
+        :return: True if the tool saves its result to `verification.output_path()`,
+            so the harness can check it (see lib.verification)
+        """
+        return False
+
     def exec_path(self, algo: AlgorithmName) -> Path:
         return config.tool_algo_exec_path(self.tool_name(), algo)
 
     def print_status(self, status: str, *args):
         util.print_status(self.tool_name(), status, *args)
 
+    def launch(self, args: List, parser: OutputParser) -> ExecutionResult:
+        """
+        Run the tool, parsing its output as it goes.
+
+        If the tool is killed by timeout or fails, the raised exception gets
+        the `partial` attribute: result of the finished iterations or None.
+        """
+        start = time.perf_counter()
+        try:
+            process.stream_output(list(map(str, args)), parser.feed_line)
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+            parser.add_phase(Phase.process, (time.perf_counter() - start) * 1000)
+            e.partial = parser.partial_result()
+            raise
+        parser.add_phase(Phase.process, (time.perf_counter() - start) * 1000)
+        return parser.result()
+
     def build(self) -> bool:
         build_tool(self.tool_name())
 
+    def ensure_built(self):
+        """
+        Build the tool on the first call, so tools whose benchmarks
+        are never run are never built
+        """
+        with _build_lock:
+            if getattr(self, '_built', False):
+                return
+            self.print_status('build', 'start')
+            self.build()
+            self._built = True
+            self.print_status('build', 'finish')
+
     def can_run(self, dataset: Dataset, algo: AlgorithmName) -> bool:
         can_run = {
             AlgorithmName.bfs: self.can_run_bfs,
             AlgorithmName.sssp: self.can_run_sssp,
-            AlgorithmName.tc: self.can_run_tc
+            AlgorithmName.tc: self.can_run_tc,
+            AlgorithmName.cc: self.can_run_cc,
+            AlgorithmName.pagerank: self.can_run_pagerank
         }
         return can_run[algo](dataset)
 
-    def run(self, dataset: Dataset, algo: AlgorithmName) -> ExecutionResult:
+    def run_iterations(self,
+                       dataset: Dataset,
+                       algo: AlgorithmName,
+                       source: int,
+                       iterations: int) -> ExecutionResult:
+        """
+        Single launch of the tool, running `iterations` iterations
+        """
+        if algo == AlgorithmName.bfs:
+            return self.run_bfs(dataset, source, iterations)
+        elif algo == AlgorithmName.sssp:
+            return self.run_sssp(dataset, source, iterations)
+        elif algo == AlgorithmName.tc:
+            return self.run_tc(dataset, iterations)
+        elif algo == AlgorithmName.cc:
+            return self.run_cc(dataset, iterations)
+        elif algo == AlgorithmName.pagerank:
+            return self.run_pagerank(dataset, iterations)
+        raise Exception(f'Unknown algorithm {algo}')
+
+    def run_steady(self,
+                   dataset: Dataset,
+                   algo: AlgorithmName,
+                   source: int,
+                   iterations: int) -> ExecutionResult:
+        """
+        Single launch of the tool with the warm-up policy from `config.WARM_UP`
+        and the page-cache state from `config.CACHE_MODE`: discarded iterations
+        are not included in the result times
+        """
+        warm_up = config.WARM_UP
+        if warm_up.policy == config.WarmUpPolicy.discard:
+            iterations += warm_up.discard
+        with page_cache.prepared(dataset) as launch_dataset:
+            result = self.run_iterations(launch_dataset, algo, source, iterations)
+        if warm_up.policy == config.WarmUpPolicy.discard:
+            result.discard(warm_up.discard)
+        elif warm_up.policy == config.WarmUpPolicy.mser:
+            result.discard(stats.mser_truncation(result.times, warm_up.batch, warm_up.max_fraction))
+        if result.discarded > 0:
+            self.print_status('warm-up', f'discarded={result.discarded}', f'policy={warm_up.policy}')
+        return result
+
+    def run_launches(self,
+                     dataset: Dataset,
+                     algo: AlgorithmName,
+                     source: int,
+                     iterations: int) -> ExecutionResult:
+        """
+        Launch the tool `config.LAUNCHES` times, each running `iterations` iterations
+        """
+        if config.LAUNCHES == 1:
+            return self.run_steady(dataset, algo, source, iterations)
+        results = []
+        try:
+            for launch in range(config.LAUNCHES):
+                self.print_status('launch', f'{launch + 1}/{config.LAUNCHES}')
+                results.append(self.run_steady(dataset, algo, source, iterations))
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+            add_partial(e, results)
+            raise
+        return ExecutionResult.merge(results)
+
+    def run_sources(self,
+                    dataset: Dataset,
+                    algo: AlgorithmName,
+                    sources: List[int]) -> ExecutionResult:
+        """
+        Run traversal from each of the sources once.
+
+        Default implementation launches the tool for every source.
+        Drivers of the tools, which accept a batch of sources, override it.
+
+        :return: execution results with one time per source
+        """
+        results = []
+        try:
+            for source in sources:
+                results.append(self.run_iterations(dataset, algo, source, 1))
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+            add_partial(e, results)
+            raise
+        return ExecutionResult.merge(results)
+
+    def run_workload(self,
+                     dataset: Dataset,
+                     algo: AlgorithmName,
+                     source_dataset: Optional[Dataset] = None) -> ExecutionResult:
+        """
+        Run traversals from the sampled sources, batch by batch
+
+        :param dataset: Dataset to launch the tool on
+        :param source_dataset: Original .mtx dataset to sample the sources from, if `dataset` is converted
+        """
+        workload = config.WORKLOAD
+        all_sources = sources.sample_sources(
+            source_dataset or dataset, workload.sources, workload.seed, workload.degree_weighted, workload.giant_only)
+        results = []
+        try:
+            for batch in sources.batches(all_sources, workload.batch):
+                with page_cache.prepared(dataset) as batch_dataset:
+                    results.append(self.run_sources(batch_dataset, algo, batch))
+                self.print_status('workload',
+                                  f'queries={sum(map(ExecutionResult.iterations, results))}/{len(all_sources)}')
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+            add_partial(e, results)
+            raise
+        return ExecutionResult.merge(results)
+
+    def run_adaptive(self,
+                     dataset: Dataset,
+                     algo: AlgorithmName,
+                     source: int) -> ExecutionResult:
+        """
+        Launch the tool with batches of iterations, until the relative
+        confidence interval of the median reaches the target, or the
+        iterations or time limit is exceeded
+        """
+        adaptive = config.ADAPTIVE
+        start = time.monotonic()
+        batches: List[ExecutionResult] = []
+        result: ExecutionResult = None
+
+        while True:
+            done = 0 if result is None else result.iterations()
+            batch = min(adaptive.batch, adaptive.max_iterations - done)
+            try:
+                batches.append(self.run_steady(dataset, algo, source, batch))
+            except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+                add_partial(e, batches)
+                raise
+            if batches[-1].iterations() == 0:
+                raise Exception(f'Tool {self.tool_name()} did not report any iteration')
+            result = ExecutionResult.merge(batches)
+            result.update_ci(adaptive.confidence)
+
+            elapsed = time.monotonic() - start
+            self.print_status('adaptive',
+                              f'iterations={result.iterations()}',
+                              f'rel_ci={result.rel_ci}',
+                              f'elapsed={elapsed:.1f}s')
+
+            if result.rel_ci is not None and result.rel_ci <= adaptive.target_rel_ci:
+                break
+            if result.iterations() >= adaptive.max_iterations:
+                break
+            if adaptive.max_time is not None and elapsed >= adaptive.max_time:
+                break
+
+        return result
+
+    def run(self,
+            dataset: Dataset,
+            algo: AlgorithmName,
+            iterations: Optional[int] = None) -> ExecutionResult:
+        """
+        Run algorithm benchmark
+
+        :param iterations: Number of iterations to run, overrides the
+            number by the dataset size and the adaptive mode
+        """
         if not self.can_run(dataset, algo):
             raise Exception(
                 f'Algorithm {str(algo)} can not be run on the dataset {dataset.name}')
 
-        dataset_category = dataset.get_category()
+        self.ensure_built()
+
+        workload = is_workload(algo)
+        adaptive = config.ADAPTIVE.enabled and iterations is None
 
-        iterations = dataset_category.iterations()
+        if iterations is None:
+            iterations = dataset.get_category().iterations()
+
+        iterations_str = str(iterations)
+        if workload:
+            iterations_str = f'workload of {config.WORKLOAD.sources} sources'
+        elif adaptive:
+            iterations_str = 'adaptive'
         source = config.DEFAULT_SOURCE
+        if algo in TRAVERSAL_ALGORITHMS:
+            source = source_index.choose_source(dataset, config.SOURCE_POLICY)
 
         self.print_status('run',
                           f'begin {algo.name}',
-                          f'iterations={iterations}',
+                          f'iterations={iterations_str}',
                           f'soure={source}')
 
-        result: ExecutionResult = None
+        # Conversion is cached and is not a part of the benchmark
+        launch_dataset, converted = conversion.converted(self.tool_name(), dataset)
 
-        if algo == AlgorithmName.bfs:
-            result = self.run_bfs(dataset, source, iterations)
-        elif algo == AlgorithmName.sssp:
-            result = self.run_sssp(dataset, source, iterations)
-        elif algo == AlgorithmName.tc:
-            result = self.run_tc(dataset, iterations)
+        result: ExecutionResult = None
+        start = time.monotonic()
+
+        def finish(result: ExecutionResult):
+            result.update_ci(config.ADAPTIVE.confidence)
+            result.wall_time = time.monotonic() - start
+            result.usage = recorder.total()
+            result.cache_mode = str(config.CACHE_MODE)
+            if converted is not None:
+                result.input_format = converted.format
+                result.conversion_time = converted.seconds
+
+        # Workload traverses from many sources, the output of one of them is not checked
+        verify = config.VERIFICATION.enabled and not workload
+
+        with process.record() as recorder, verification.saving(verify and self.saves_output()) as output:
+            try:
+                if workload:
+                    result = self.run_workload(launch_dataset, algo, source_dataset=dataset)
+                elif adaptive:
+                    result = self.run_adaptive(launch_dataset, algo, source)
+                else:
+                    result = self.run_launches(launch_dataset, algo, source, iterations)
+            except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+                if getattr(e, 'partial', None) is not None:
+                    finish(e.partial)
+                    self.print_status('run', f'aborted {str(algo.name)}', e.partial.brief_str())
+                raise
+            finish(result)
+            if output is not None:
+                result.verified = verification.verify(str(self.tool_name()), dataset, algo, source, output)
+            elif verify:
+                verification.print_status(f'{self.tool_name()} {dataset.name} {algo}', 'not checked',
+                                          'tool does not save its output')
 
         self.print_status(
             'run', f'finish {str(algo.name)}', result.brief_str())
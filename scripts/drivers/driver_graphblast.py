@@ -1,12 +1,9 @@
-import subprocess
-
 import drivers.driver as driver
 import config
 
 from lib.algorithm import AlgorithmName
 from lib.tool import ToolName
-from lib.dataset import Dataset
-from lib.util import check_output
+from lib.dataset import Dataset, DatasetValueType
 
 
 class DriverGraphBLAST(driver.Driver):
@@ -14,16 +11,26 @@ class DriverGraphBLAST(driver.Driver):
         self_config = config.TOOL_CONFIG[ToolName.graphblast].config
 
         self.timing = self_config.timing
-        self.skip_cpu_verify = int(self_config.skip_cpu_verify)
+        self.skip_cpu_verify = self_config.skip_cpu_verify
 
     def can_run_bfs(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        # Values of the weighted graphs are ignored by the traversal
+        return True
 
     def can_run_sssp(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        # Pattern graphs have no weights to relax
+        return dataset.get_element_type() != DatasetValueType.void
 
     def can_run_tc(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        return True
+
+    def can_run_cc(self, dataset: Dataset) -> bool:
+        # GraphBLAST has no connected components benchmark
+        return False
+
+    def can_run_pagerank(self, dataset: Dataset) -> bool:
+        # GraphBLAST has no pagerank benchmark
+        return False
 
     def run_bfs(self,
                 dataset: Dataset,
@@ -32,14 +39,14 @@ class DriverGraphBLAST(driver.Driver):
 
         directed_flag = 1 if dataset.get_directed() else 2
 
-        output = check_output([str(self.exec_path(AlgorithmName.bfs)),
-                               f"--source={source_vertex}",
-                               f"--niter={num_iterations}",
-                               f"--timing={self.timing}",
-                               f"--directed={directed_flag}",
-                               f"--skip_cpu_verify={self.skip_cpu_verify}",
-                               str(dataset.path)])
-        return DriverGraphBLAST._parse_output(output, num_iterations)
+        return self.launch([str(self.exec_path(AlgorithmName.bfs)),
+                            f"--source={source_vertex}",
+                            f"--niter={num_iterations}",
+                            f"--timing={self.timing}",
+                            f"--directed={directed_flag}",
+                            f"--skip_cpu_verify={self.skip_cpu_verify_flag()}",
+                            str(dataset.path)],
+                           GraphBLASTOutputParser(self.tool_name(), num_iterations))
 
     def run_sssp(self,
                  dataset: Dataset,
@@ -48,14 +55,14 @@ class DriverGraphBLAST(driver.Driver):
 
         directed_flag = 1 if dataset.get_directed() else 2
 
-        output = check_output([str(self.exec_path(AlgorithmName.sssp)),
-                               f"--source={source_vertex}",
-                               f"--niter={num_iterations}",
-                               f"--timing={self.timing}",
-                               f"--directed={directed_flag}",
-                               f"--skip_cpu_verify={self.skip_cpu_verify}",
-                               str(dataset.path)])
-        return DriverGraphBLAST._parse_output(output, num_iterations)
+        return self.launch([str(self.exec_path(AlgorithmName.sssp)),
+                            f"--source={source_vertex}",
+                            f"--niter={num_iterations}",
+                            f"--timing={self.timing}",
+                            f"--directed={directed_flag}",
+                            f"--skip_cpu_verify={self.skip_cpu_verify_flag()}",
+                            str(dataset.path)],
+                           GraphBLASTOutputParser(self.tool_name(), num_iterations))
 
     def run_tc(self,
                dataset: Dataset,
@@ -63,27 +70,79 @@ class DriverGraphBLAST(driver.Driver):
 
         directed_flag = 1 if dataset.get_directed() else 2
 
-        output = check_output([str(self.exec_path(AlgorithmName.tc)),
-                               f"--niter={num_iterations}",
-                               f"--timing={self.timing}",
-                               f"--directed={directed_flag}",
-                               f"--skip_cpu_verify={self.skip_cpu_verify}",
-                               str(dataset.path)])
-        return DriverGraphBLAST._parse_output(output, num_iterations)
+        return self.launch([str(self.exec_path(AlgorithmName.tc)),
+                            f"--niter={num_iterations}",
+                            f"--timing={self.timing}",
+                            f"--directed={directed_flag}",
+                            f"--skip_cpu_verify={self.skip_cpu_verify_flag()}",
+                            str(dataset.path)],
+                           GraphBLASTOutputParser(self.tool_name(), num_iterations))
+
+    def run_cc(self,
+               dataset: Dataset,
+               num_iterations: int) -> driver.ExecutionResult:
+        raise Exception('GraphBLAST has no connected components benchmark')
+
+    def run_pagerank(self,
+                     dataset: Dataset,
+                     num_iterations: int) -> driver.ExecutionResult:
+        raise Exception('GraphBLAST has no pagerank benchmark')
+
+    def skip_cpu_verify_flag(self) -> int:
+        if self.skip_cpu_verify is None:
+            # Checking is moved out of the measured launch
+            return int(config.VERIFICATION.enabled)
+        return int(self.skip_cpu_verify)
 
     def tool_name(self) -> ToolName:
         return ToolName.graphblast
 
-    @staticmethod
-    def _parse_output(output, n):
-        lines = output.decode("ASCII").replace("\r", "").split("\n")
-        warmup = 0.0
-        tight = 0.0
-        for line in lines:
-            if line.startswith("warmup"):
-                warmup = float(line.replace(",", "").split(" ")[1])
-            if line.startswith("tight"):
-                # TODO: is it correct?..
-                tight = float(line.replace(",", "").split(" ")[1])
 
-        return driver.ExecutionResult(warmup, [tight] * n)
+class GraphBLASTOutputParser(driver.OutputParser):
+    """
+    With `--timing=1` every algorithm call prints its levels as
+    `<level>, ..., <time>` lines: the call time is the sum of its level
+    times, and a new call starts when the level number does not grow.
+    Without these lines only the mean `tight` time of all calls is known.
+    """
+
+    def __init__(self, tool: ToolName, n: int):
+        super().__init__(tool)
+        self.n = n
+        self.level = -1
+        self.call_time = None
+
+    def feed(self, line: str):
+        if line.startswith("warmup"):
+            # Levels, printed so far, belong to the warm-up call
+            self.call_time = None
+            self.level = -1
+            self.warm_up = float(line.replace(",", "").split(" ")[1])
+        elif line.startswith("tight"):
+            self.finish_call()
+            if not self.times:
+                tight = float(line.replace(",", "").split(" ")[1])
+                for _ in range(self.n):
+                    self.add_time(tight)
+        else:
+            self.feed_level(line)
+
+    def feed_level(self, line: str):
+        tokens = [token.strip() for token in line.split(",") if token.strip()]
+        if len(tokens) < 2 or not tokens[0].isdigit():
+            return
+        try:
+            time = float(tokens[-1])
+        except ValueError:
+            return
+        level = int(tokens[0])
+        if level <= self.level:
+            self.finish_call()
+        self.level = level
+        self.call_time = time if self.call_time is None else self.call_time + time
+
+    def finish_call(self):
+        if self.call_time is not None:
+            self.add_time(self.call_time)
+        self.call_time = None
+        self.level = -1
@@ -1,9 +1,9 @@
 import drivers.driver as driver
+import config
 
-from lib.dataset import Dataset
+from lib.dataset import Dataset, DatasetValueType
 from lib.algorithm import AlgorithmName
 from lib.tool import ToolName
-from lib.util import check_output
 
 
 class DriverGunrock(driver.Driver):
@@ -14,63 +14,118 @@ class DriverGunrock(driver.Driver):
         self.device = 0
 
     def can_run_bfs(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        # Values of the weighted graphs are ignored by the traversal
+        return True
 
     def can_run_sssp(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        # Pattern graphs have no weights to relax
+        return dataset.get_element_type() != DatasetValueType.void
 
     def can_run_tc(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        return True
+
+    def can_run_cc(self, dataset: Dataset) -> bool:
+        return True
+
+    def can_run_pagerank(self, dataset: Dataset) -> bool:
+        return True
 
     def run_bfs(self,
                 dataset: Dataset,
                 source_vertex: int,
                 num_iterations: int) -> driver.ExecutionResult:
 
-        output = check_output([str(self.exec_path(AlgorithmName.bfs)),
-                               f"--src={source_vertex}",
-                               f"--num-runs={num_iterations + 1}",
-                               f"--undirected={int(not dataset.get_directed())}",
-                               f"--graph-file={dataset.path}",
-                               f"--graph-type={self.type}",
-                               f"--device={self.device}"])
-        return DriverGunrock._parse_output(output)
+        return self.launch([str(self.exec_path(AlgorithmName.bfs)),
+                            f"--src={source_vertex}",
+                            f"--num-runs={num_iterations + 1}",
+                            f"--undirected={int(not dataset.get_directed())}",
+                            f"--graph-file={dataset.path}",
+                            f"--graph-type={self.type}",
+                            f"--device={self.device}"],
+                           GunrockOutputParser(self.tool_name()))
 
     def run_sssp(self,
                  dataset: Dataset,
                  source_vertex: int,
                  num_iterations: int) -> driver.ExecutionResult:
 
-        output = check_output([str(self.exec_path(AlgorithmName.sssp)),
-                               f"--src={source_vertex}",
-                               f"--num-runs={num_iterations + 1}",
-                               f"--undirected={int(not dataset.get_directed())}",
-                               f"--graph-file={dataset.path}",
-                               f"--graph-type={self.type}",
-                               f"--device={self.device}"])
-        return DriverGunrock._parse_output(output)
+        return self.launch([str(self.exec_path(AlgorithmName.sssp)),
+                            f"--src={source_vertex}",
+                            f"--num-runs={num_iterations + 1}",
+                            f"--undirected={int(not dataset.get_directed())}",
+                            f"--graph-file={dataset.path}",
+                            f"--graph-type={self.type}",
+                            f"--device={self.device}"],
+                           GunrockOutputParser(self.tool_name()))
 
     def run_tc(self,
                dataset: Dataset,
                num_iterations: int) -> driver.ExecutionResult:
 
-        output = check_output([str(self.exec_path(AlgorithmName.tc)),
-                               f"--num-runs={num_iterations + 1}",
-                               f"--undirected={int(not dataset.get_directed())}",
-                               f"--graph-file={dataset.path}",
-                               f"--graph-type={self.type}",
-                               f"--device={self.device}"])
-        return DriverGunrock._parse_output(output)
+        return self.launch([str(self.exec_path(AlgorithmName.tc)),
+                            f"--num-runs={num_iterations + 1}",
+                            f"--undirected={int(not dataset.get_directed())}",
+                            f"--graph-file={dataset.path}",
+                            f"--graph-type={self.type}",
+                            f"--device={self.device}"],
+                           GunrockOutputParser(self.tool_name()))
+
+    def run_cc(self,
+               dataset: Dataset,
+               num_iterations: int) -> driver.ExecutionResult:
+
+        # Components are computed on the undirected graph (weakly connected ones)
+        return self.launch([str(self.exec_path(AlgorithmName.cc)),
+                            f"--num-runs={num_iterations + 1}",
+                            "--undirected=1",
+                            f"--graph-file={dataset.path}",
+                            f"--graph-type={self.type}",
+                            f"--device={self.device}"],
+                           GunrockOutputParser(self.tool_name()))
+
+    def run_pagerank(self,
+                     dataset: Dataset,
+                     num_iterations: int) -> driver.ExecutionResult:
+
+        pagerank = config.PAGERANK
+        return self.launch([str(self.exec_path(AlgorithmName.pagerank)),
+                            f"--num-runs={num_iterations + 1}",
+                            f"--delta={pagerank.damping}",
+                            f"--threshold={pagerank.tolerance}",
+                            f"--max-iter={pagerank.max_iterations}",
+                            "--normalize=true",
+                            f"--undirected={int(not dataset.get_directed())}",
+                            f"--graph-file={dataset.path}",
+                            f"--graph-type={self.type}",
+                            f"--device={self.device}"],
+                           GunrockOutputParser(self.tool_name(), count_sweeps=True))
 
     def tool_name(self) -> ToolName:
         return ToolName.gunrock
 
-    @staticmethod
-    def _parse_output(output):
-        lines = output.decode("ASCII").replace("\r", "").split("\n")
-        runs = []
-        for line in lines:
-            if line.startswith("Run ") and not line.startswith("Run CPU"):
-                runs.append(float(line.split(" ")[3]))
-        # First one is warm-up (we add it implicitly)
-        return driver.ExecutionResult(runs[0], runs[1:])
+
+class GunrockOutputParser(driver.OutputParser):
+    # Load time includes reading the file and building the CSR, preprocess time
+    # is the allocation of the problem on the device and the copy of the graph
+    PHASE_LINES = {
+        driver.Phase.read: ("load time:", 2, 1),
+        driver.Phase.transfer: ("preprocess time:", 2, 1)
+    }
+
+    def __init__(self, tool: ToolName, count_sweeps: bool = False):
+        super().__init__(tool)
+        # First run is warm-up (we add it implicitly)
+        self.first = True
+        # Take the iterations until convergence from `#iterations = N` of the run lines
+        self.count_sweeps = count_sweeps
+
+    def feed(self, line: str):
+        if line.startswith("Run ") and not line.startswith("Run CPU"):
+            time = float(line.split(" ")[3])
+            if self.first:
+                self.first = False
+                self.warm_up = time
+            else:
+                self.add_time(time)
+            if self.count_sweeps and "#iterations = " in line:
+                self.sweeps = int(line.split("#iterations = ")[1].split(",")[0])
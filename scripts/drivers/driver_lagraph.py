@@ -1,88 +1,119 @@
 import os
-import time
+import tempfile
 
 from typing import List
 
-from drivers.driver import ExecutionResult, Driver
-from lib.dataset import Dataset
+from drivers.driver import ExecutionResult, Driver, OutputParser, Phase
+from lib.dataset import Dataset, DatasetValueType
 from lib.algorithm import AlgorithmName
 from lib.tool import ToolName
-from lib.util import check_output
 
 
 class DriverLaGraph(Driver):
     def can_run_bfs(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        # Values of the weighted graphs are ignored by the traversal
+        return True
 
     def can_run_sssp(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        # Pattern graphs have no weights to relax
+        return dataset.get_element_type() != DatasetValueType.void
 
     def can_run_tc(self, dataset: Dataset) -> bool:
-        raise NotImplementedError()
+        return True
+
+    def can_run_cc(self, dataset: Dataset) -> bool:
+        return True
+
+    def can_run_pagerank(self, dataset: Dataset) -> bool:
+        # Damping and tolerance of the pagerank demo are fixed, so it
+        # could not be compared with the parameters of the other tools
+        return False
 
     def run_bfs(self,
                 dataset: Dataset,
                 source_vertex: int,
                 num_iterations: int) -> ExecutionResult:
-
-        with TemporarySourcesFile([source_vertex + 1] * num_iterations) as sources_file:
-            output = check_output([
-                self.exec_path(AlgorithmName.bfs),
-                dataset.path,
-                sources_file.name
-            ])
-
-            return DriverLaGraph._parse_output(output, "parent only", 9, "warmup", 4)
+        return self.run_sources(dataset, AlgorithmName.bfs, [source_vertex] * num_iterations)
 
     def run_sssp(self,
                  dataset: Dataset,
                  source_vertex: int,
                  num_iterations: int) -> ExecutionResult:
-
-        with TemporarySourcesFile([source_vertex + 1] * num_iterations) as sources_file:
-            output = check_output([
-                self.exec_path(AlgorithmName.sssp),
-                dataset.path,
-                sources_file.name
-            ])
-
-            return DriverLaGraph._parse_output(output, "sssp", 8)
+        return self.run_sources(dataset, AlgorithmName.sssp, [source_vertex] * num_iterations)
 
     def run_tc(self,
                dataset: Dataset,
                num_iterations: int) -> ExecutionResult:
 
-        output = check_output([
+        return self.launch([
             self.exec_path(AlgorithmName.tc),
             dataset.path
-        ])
+        ], LaGraphOutputParser(self.tool_name(), "trial ", 2, "nthreads: ", 3))
 
-        return DriverLaGraph._parse_output(output, "trial ", 2, "nthreads: ", 3)
+    def run_cc(self,
+               dataset: Dataset,
+               num_iterations: int) -> ExecutionResult:
+
+        # Demo prints the trials in the same format as tc_demo
+        return self.launch([
+            self.exec_path(AlgorithmName.cc),
+            dataset.path
+        ], LaGraphOutputParser(self.tool_name(), "trial ", 2, "nthreads: ", 3))
+
+    def run_pagerank(self,
+                     dataset: Dataset,
+                     num_iterations: int) -> ExecutionResult:
+        raise Exception('LaGraph pagerank demo does not accept the pagerank parameters')
+
+    def run_sources(self,
+                    dataset: Dataset,
+                    algo: AlgorithmName,
+                    sources: List[int]) -> ExecutionResult:
+        # Demos run one trial per source from the sources file
+        parse_args = {
+            AlgorithmName.bfs: ("parent only", 9, "warmup", 4),
+            AlgorithmName.sssp: ("sssp", 8)
+        }
+        if algo not in parse_args:
+            return Driver.run_sources(self, dataset, algo, sources)
+
+        with TemporarySourcesFile([source + 1 for source in sources]) as sources_file:
+            return self.launch([
+                self.exec_path(algo),
+                dataset.path,
+                sources_file.name
+            ], LaGraphOutputParser(self.tool_name(), *parse_args[algo]))
 
     def tool_name(self) -> ToolName:
         return ToolName.lagraph
 
-    @staticmethod
-    def _parse_output(output: bytes,
-                      trial_line_start: str,
-                      trial_line_token: int,
-                      warmup_line_start: str = None,
-                      warmup_line_token: int = None):
-        time_factor = 1000
-        lines = output.decode("ASCII").split("\n")
-        trials = []
-        for trial_line in lines_startswith(lines, trial_line_start):
-            trials.append(float(tokenize(trial_line)[
-                          trial_line_token]) * time_factor)
-        warmup = 0
-        if warmup_line_start is not None:
-            warmup = float(tokenize(lines_startswith(lines, warmup_line_start)[0])[
-                           warmup_line_token]) * time_factor
-        return ExecutionResult(warmup, trials)
-
 
-def lines_startswith(lines: List[str], token) -> List[str]:
-    return list(filter(lambda s: s.startswith(token), lines))
+class LaGraphOutputParser(OutputParser):
+    PHASE_LINES = {
+        Phase.read: ("read time:", 2, 1000)
+    }
+
+    def __init__(self,
+                 tool: ToolName,
+                 trial_line_start: str,
+                 trial_line_token: int,
+                 warmup_line_start: str = None,
+                 warmup_line_token: int = None):
+        super().__init__(tool)
+        self.trial_line_start = trial_line_start
+        self.trial_line_token = trial_line_token
+        self.warmup_line_start = warmup_line_start
+        self.warmup_line_token = warmup_line_token
+        self.warmup_found = False
+
+    def feed(self, line: str):
+        time_factor = 1000
+        if line.startswith(self.trial_line_start):
+            self.add_time(float(tokenize(line)[self.trial_line_token]) * time_factor)
+        if (self.warmup_line_start is not None and not self.warmup_found
+                and line.startswith(self.warmup_line_start)):
+            self.warmup_found = True
+            self.warm_up = float(tokenize(line)[self.warmup_line_token]) * time_factor
 
 
 def tokenize(line: str) -> List[str]:
@@ -91,7 +122,9 @@ def tokenize(line: str) -> List[str]:
 
 class TemporarySourcesFile():
     def __init__(self, sources: List[int]):
-        self.name = f'sources_{str(time.ctime())}_.mtx'
+        # Unique name, so concurrently running benchmarks do not clash
+        fd, self.name = tempfile.mkstemp(prefix='sources_', suffix='.mtx')
+        os.close(fd)
         self.freeze = False
         self.fd = None
         self.sources = sources
@@ -0,0 +1,122 @@
+import sys
+
+from typing import List, Optional
+
+import drivers.driver as driver
+import lib.reference as reference
+import lib.verification as verification
+import config
+
+from lib.algorithm import AlgorithmName
+from lib.tool import ToolName
+from lib.dataset import Dataset
+
+
+# Benchmark executable of the reference implementations
+REFERENCE_TOOL = config.ROOT / 'scripts' / 'reference_tool.py'
+
+
+class DriverSciPy(driver.Driver):
+    """
+    Driver of the reference tool: vectorized SciPy implementations,
+    which run on any host without the native builds. The tool is run
+    in its own Python process, so the limits, the placement and the
+    resources accounting are the same as for the other tools.
+    """
+
+    def can_run_bfs(self, dataset: Dataset) -> bool:
+        return True
+
+    def can_run_sssp(self, dataset: Dataset) -> bool:
+        return True
+
+    def can_run_tc(self, dataset: Dataset) -> bool:
+        return True
+
+    def can_run_cc(self, dataset: Dataset) -> bool:
+        return True
+
+    def can_run_pagerank(self, dataset: Dataset) -> bool:
+        return True
+
+    def run_bfs(self,
+                dataset: Dataset,
+                source_vertex: int,
+                num_iterations: int) -> driver.ExecutionResult:
+
+        return self.run_reference(AlgorithmName.bfs, dataset, num_iterations, source_vertex)
+
+    def run_sssp(self,
+                 dataset: Dataset,
+                 source_vertex: int,
+                 num_iterations: int) -> driver.ExecutionResult:
+
+        return self.run_reference(AlgorithmName.sssp, dataset, num_iterations, source_vertex)
+
+    def run_tc(self,
+               dataset: Dataset,
+               num_iterations: int) -> driver.ExecutionResult:
+
+        return self.run_reference(AlgorithmName.tc, dataset, num_iterations)
+
+    def run_cc(self,
+               dataset: Dataset,
+               num_iterations: int) -> driver.ExecutionResult:
+
+        return self.run_reference(AlgorithmName.cc, dataset, num_iterations)
+
+    def run_pagerank(self,
+                     dataset: Dataset,
+                     num_iterations: int) -> driver.ExecutionResult:
+
+        pagerank = config.PAGERANK
+        return self.run_reference(AlgorithmName.pagerank, dataset, num_iterations,
+                                  extra_args=[f"--damping={pagerank.damping}",
+                                              f"--tolerance={pagerank.tolerance}",
+                                              f"--max-iterations={pagerank.max_iterations}"])
+
+    def run_reference(self,
+                      algo: AlgorithmName,
+                      dataset: Dataset,
+                      num_iterations: int,
+                      source_vertex: int = config.DEFAULT_SOURCE,
+                      extra_args: Optional[List[str]] = None) -> driver.ExecutionResult:
+
+        output = verification.output_path()
+        if output is not None:
+            extra_args = (extra_args or []) + [f"--output={output}"]
+
+        return self.launch([
+            sys.executable,
+            REFERENCE_TOOL,
+            str(algo),
+            dataset.path,
+            f"--source={source_vertex}",
+            f"--niters={num_iterations}",
+            *(extra_args or [])
+        ], SciPyOutputParser(self.tool_name()))
+
+    def saves_output(self) -> bool:
+        return True
+
+    def build(self):
+        # Nothing to build, but SciPy may be not installed
+        reference.require()
+
+    def tool_name(self) -> ToolName:
+        return ToolName.scipy
+
+
+class SciPyOutputParser(driver.OutputParser):
+    PHASE_LINES = {
+        driver.Phase.read: ("read time(ms):", 2, 1),
+        driver.Phase.build: ("build time(ms):", 2, 1)
+    }
+
+    def feed(self, line: str):
+        if line.startswith("warm-up(ms):"):
+            self.warm_up = float(line.split(" ")[1])
+        if line.startswith("iteration(ms):"):
+            self.add_time(float(line.split(" ")[1]))
+        if line.startswith("pagerank iterations:"):
+            self.sweeps = int(line.split(" ")[2])
@@ -4,7 +4,6 @@ from lib.dataset import Dataset
 from lib.algorithm import AlgorithmName
 from lib.tool import ToolName
 from lib.dataset import DatasetValueType
-from lib.util import check_output
 
 
 class DriverSpla(driver.Driver):
@@ -17,33 +16,37 @@ class DriverSpla(driver.Driver):
     def can_run_tc(self, dataset: Dataset) -> bool:
         return True
 
+    def can_run_cc(self, dataset: Dataset) -> bool:
+        # Spla has no connected components benchmark
+        return False
+
+    def can_run_pagerank(self, dataset: Dataset) -> bool:
+        # Spla has no pagerank benchmark
+        return False
+
     def run_bfs(self,
                 dataset: Dataset,
                 source_vertex: int,
                 num_iterations: int) -> driver.ExecutionResult:
 
-        output = check_output([
+        return self.launch([
             self.exec_path(AlgorithmName.bfs),
             f"--mtxpath={dataset.path}",
             f"--niters={num_iterations}",
             f"--source={source_vertex}"
-        ])
-
-        return DriverSpla._parse_output(output)
+        ], SplaOutputParser(self.tool_name()))
 
     def run_sssp(self,
                  dataset: Dataset,
                  source_vertex: int,
                  num_iterations: int) -> driver.ExecutionResult:
 
-        output = check_output([
+        return self.launch([
             self.exec_path(AlgorithmName.sssp),
             f"--mtxpath={dataset.path}",
             f"--niters={num_iterations}",
             f"--source={source_vertex}"
-        ])
-
-        return DriverSpla._parse_output(output)
+        ], SplaOutputParser(self.tool_name()))
 
     def run_tc(self,
                dataset: Dataset,
@@ -51,25 +54,32 @@ class DriverSpla(driver.Driver):
 
         dir_flag = 'true' if not dataset.get_directed() else 'false'
 
-        output = check_output([
+        return self.launch([
             self.exec_path(AlgorithmName.tc),
             f"--mtxpath={dataset.path}",
             f"--niters={num_iterations}",
             f"--undirected={dir_flag}"
-        ])
-        return DriverSpla._parse_output(output)
+        ], SplaOutputParser(self.tool_name()))
+
+    def run_cc(self,
+               dataset: Dataset,
+               num_iterations: int) -> driver.ExecutionResult:
+        raise Exception('Spla has no connected components benchmark')
+
+    def run_pagerank(self,
+                     dataset: Dataset,
+                     num_iterations: int) -> driver.ExecutionResult:
+        raise Exception('Spla has no pagerank benchmark')
 
     def tool_name(self) -> ToolName:
         return ToolName.spla
 
-    @staticmethod
-    def _parse_output(output):
-        lines = output.decode("ASCII").replace("\r", "").split("\n")
-        warmup = 0.0
-        runs = []
-        for line in lines:
-            if line.startswith("warm-up(ms):"):
-                warmup = float(line.split(" ")[1])
-            if line.startswith("iters(ms):"):
-                runs = [float(v) for v in line.split(" ")[1:-1]]
-        return driver.ExecutionResult(warmup, runs)
+
+class SplaOutputParser(driver.OutputParser):
+    def feed(self, line: str):
+        if line.startswith("warm-up(ms):"):
+            self.warm_up = float(line.split(" ")[1])
+        if line.startswith("iters(ms):"):
+            # All iterations are printed at once, when the benchmark finishes
+            for value in line.split(" ")[1:-1]:
+                self.add_time(float(value))
@@ -0,0 +1,33 @@
+import importlib
+import threading
+
+from typing import Dict, Tuple
+
+from lib.tool import ToolName
+from drivers.driver import Driver
+
+
+# Module and class of the driver of each tool.
+# Modules are imported only when the driver is requested.
+DRIVER_CLASSES: Dict[ToolName, Tuple[str, str]] = {
+    ToolName.spla: ('drivers.driver_spla', 'DriverSpla'),
+    ToolName.lagraph: ('drivers.driver_lagraph', 'DriverLaGraph'),
+    ToolName.gunrock: ('drivers.driver_gunrock', 'DriverGunrock'),
+    ToolName.graphblast: ('drivers.driver_graphblast', 'DriverGraphBLAST'),
+    ToolName.scipy: ('drivers.driver_scipy', 'DriverSciPy'),
+}
+
+_drivers: Dict[ToolName, Driver] = {}
+_lock = threading.Lock()
+
+
+def get_driver(tool: ToolName) -> Driver:
+    """
+    :return: The only driver instance of the tool (the tool is built on its first run)
+    """
+    with _lock:
+        if tool not in _drivers:
+            module_name, class_name = DRIVER_CLASSES[tool]
+            module = importlib.import_module(module_name)
+            _drivers[tool] = getattr(module, class_name)()
+        return _drivers[tool]
@@ -0,0 +1,45 @@
+import os
+
+from contextlib import contextmanager
+from typing import List, Iterable
+
+
+def can_pin() -> bool:
+    return hasattr(os, 'sched_setaffinity') and hasattr(os, 'sched_getaffinity')
+
+
+def available_cpus() -> List[int]:
+    """
+    :return: Sorted list of cpus, which this process is allowed to run on
+    """
+    if can_pin():
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpus_repr(cpus: Iterable[int]) -> str:
+    return ','.join(map(str, sorted(cpus)))
+
+
+@contextmanager
+def pinned(cpus: Iterable[int]):
+    """
+    Pin the calling thread to the given cpus.
+
+    On Linux `sched_setaffinity(0, ...)` changes the mask of the calling
+    thread only, and every child process forked from this thread
+    inherits it. So all tools, launched inside this context, run
+    on the given cpus. Previous mask is restored on exit.
+
+    On systems without affinity support this is a no-op.
+    """
+    if not can_pin():
+        yield
+        return
+
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, set(cpus))
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
@@ -5,6 +5,8 @@ class AlgorithmName(Enum):
     bfs = 'bfs'
     tc = 'tc'
     sssp = 'sssp'
+    cc = 'cc'
+    pagerank = 'pagerank'
 
     def __str__(self):
         return self.value
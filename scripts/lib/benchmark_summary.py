@@ -1,16 +1,20 @@
 import csv
 import os
 
+from dataclasses import asdict, fields
 from typing import Dict, List, Tuple, Callable
 from enum import Enum
 from pathlib import Path
 from datetime import datetime
 
+import config
+import lib.threads as threads
+
 from lib.tool import ToolName
-from lib.dataset import Dataset
 from lib.algorithm import AlgorithmName
 from lib.util import print_status
-from drivers.driver import ExecutionResult
+from drivers.driver import ExecutionResult, Phase
+from lib.process import ResourceUsage
 
 
 """
@@ -40,9 +44,14 @@ def print_median(result: ExecutionResult):
     return str(result.median())
 
 
+def print_tail(result: ExecutionResult):
+    return result.tail_str()
+
+
 class ResultsPrinter(Enum):
     all = 'all'
     median = 'median'
+    tail = 'tail'
 
     def __str__(self) -> str:
         return self.value
@@ -50,64 +59,91 @@ class ResultsPrinter(Enum):
     def print(self, result: ExecutionResult) -> str:
         match_printer = {
             ResultsPrinter.all: print_all_results,
-            ResultsPrinter.median: print_median
+            ResultsPrinter.median: print_median,
+            ResultsPrinter.tail: print_tail
         }
         return match_printer[self](result)
 
 
+def make_output_dir(output_dir: Path) -> Path:
+    """
+    Create directory for the results of the current benchmarks run,
+    named by the moment of the run, and point `recent` symlink to it
+    """
+    output_dir.mkdir(exist_ok=True)
+    output = output_dir / datetime.ctime(datetime.now())
+    output.mkdir(exist_ok=False)
+    recent_link = output_dir / 'recent'
+    if recent_link.is_symlink() or recent_link.exists():
+        os.remove(recent_link)
+    os.symlink(output, recent_link, target_is_directory=True)
+
+    print_status('summary', 'output', f'symlink: {recent_link}, original: {output}')
+
+    return output
+
+
+# Results of the same tool, measured in different configurations
+# (for example, with the different number of threads), are the different variants
+Variant = str
+
+
+def column_name(tool: ToolName, variant: Variant) -> str:
+    if not variant:
+        return str(tool)
+    return f'{tool}[{variant}]'
+
+
 class BenchmarkSummary:
     def __init__(self):
         self.measurements: Dict[AlgorithmName,
-                                Dict[str, Dict[ToolName, ExecutionResult]]] = {}
+                                Dict[str, Dict[Tuple[ToolName, Variant], ExecutionResult]]] = {}
 
     def add_measurement(self,
                         tool: ToolName,
-                        dataset: Dataset,
+                        dataset_name: str,
                         algo: AlgorithmName,
-                        result: ExecutionResult):
-        (
+                        result: ExecutionResult,
+                        variant: Variant = ''):
+        results = (
             self.measurements
             .setdefault(algo, {})
-            .setdefault(dataset.name, {})
-            .setdefault(tool, result)
+            .setdefault(dataset_name, {})
         )
+        # Repeated measurements are kept as the separate launches
+        if (tool, variant) in results:
+            result = ExecutionResult.merge([results[(tool, variant)], result])
+        results[(tool, variant)] = result
 
     def algorithms(self) -> List[AlgorithmName]:
         return list(self.measurements.keys())
 
-    def results_per_algorithm(self) -> List[Tuple[AlgorithmName, Dict[str, Dict[ToolName, ExecutionResult]]]]:
+    def results_per_algorithm(self) -> List[Tuple[AlgorithmName, Dict[str, Dict[Tuple[ToolName, Variant], ExecutionResult]]]]:
         return list(self.measurements.items())
 
-    def results_per_algorithm_dataset(self) -> List[Tuple[AlgorithmName, str, Dict[ToolName, ExecutionResult]]]:
+    def results_per_algorithm_dataset(self) -> List[Tuple[AlgorithmName, str, Dict[Tuple[ToolName, Variant], ExecutionResult]]]:
         items = []
         for algo, results in self.results_per_algorithm():
             items.extend(
                 map(lambda item: (algo, item[0], item[1]), results.items()))
         return items
 
-    def measurements_list(self) -> List[Tuple[AlgorithmName, str, ToolName, ExecutionResult]]:
+    def measurements_list(self) -> List[Tuple[AlgorithmName, str, ToolName, Variant, ExecutionResult]]:
         items = []
         for algo, tool_by_dataset in self.measurements.items():
             for dataset_name, result_by_tool in tool_by_dataset.items():
-                for tool, result in result_by_tool.items():
-                    items.append((algo, dataset_name, tool, result))
+                for (tool, variant), result in result_by_tool.items():
+                    items.append((algo, dataset_name, tool, variant, result))
         return items
 
-    def dump(self, format: OutputFormat, output_dir: Path, results_printer: Callable):
-        output_dir.mkdir(exist_ok=True)
-        output = output_dir / datetime.ctime(datetime.now())
-        output.mkdir(exist_ok=False)
-        recent_link = output_dir / 'recent'
-        if recent_link.exists():
-            os.remove(recent_link)
-        os.symlink(output, recent_link, target_is_directory=True)
-
-        print_status('summary', 'dump', f'symlink: {recent_link}, original: {output}')
+    def dump(self, format: OutputFormat, output: Path, results_printer: Callable):
+        print_status('summary', 'dump', f'{output}')
 
         if format == OutputFormat.raw:
             def process_result(t):
-                algo, dataset, tool, result = t
-                return f'algo: {algo}, dataset: {dataset}, tool: {tool}, result: {results_printer.print(result)}'
+                algo, dataset, tool, variant, result = t
+                variant_str = f', variant: {variant}' if variant else ''
+                return f'algo: {algo}, dataset: {dataset}, tool: {tool}{variant_str}, result: {results_printer.print(result)}'
 
             processed_measurements = list(
                 map(process_result, self.measurements_list()))
@@ -123,19 +159,223 @@ class BenchmarkSummary:
 
                 if algo_results == {}:
                     continue
-                all_tools = map(
-                    str, list(list(algo_results.values())[0].keys()))
+                all_columns = []
+                for dataset_results in algo_results.values():
+                    for tool, variant in dataset_results.keys():
+                        if column_name(tool, variant) not in all_columns:
+                            all_columns.append(column_name(tool, variant))
                 with algo_output.open('w') as algo_file:
                     csv_writer = csv.DictWriter(
-                        algo_file, ['dataset', *all_tools])
+                        algo_file, ['dataset', *all_columns])
                     csv_writer.writeheader()
                     for dataset_name, dataset_results in algo_results.items():
                         csv_row = {}
-                        for tool, result in dataset_results.items():
-                            csv_row[str(tool)] = results_printer.print(
+                        for (tool, variant), result in dataset_results.items():
+                            csv_row[column_name(tool, variant)] = results_printer.print(
                                 result)
                         csv_row['dataset'] = dataset_name
                         csv_writer.writerow(csv_row)
 
+            self.dump_resources(output / 'resources.csv')
+            if any(map(lambda m: m[4].nested() is not None, self.measurements_list())):
+                self.dump_launches(output / 'launches.csv')
+            if any(map(lambda m: m[4].drift is not None, self.measurements_list())):
+                self.dump_calibration(output / 'calibration.csv')
+            if any(map(lambda m: m[4].threads is not None, self.measurements_list())):
+                self.dump_scaling(output / 'scaling.csv')
+            if any(map(lambda m: m[4].phases, self.measurements_list())):
+                self.dump_phases(output / 'phases.csv')
+            if any(map(lambda m: m[4].sweeps, self.measurements_list())):
+                self.dump_convergence(output / 'convergence.csv')
+            if any(map(lambda m: m[4].verified is not None, self.measurements_list())):
+                self.dump_verification(output / 'verification.csv')
+            if any(map(lambda m: m[4].input_format is not None, self.measurements_list())):
+                self.dump_conversion(output / 'conversion.csv')
+
         else:
             raise Exception(f'Format {format.name} is not supported')
+
+    def dump_resources(self, output_file: Path):
+        usage_fields = list(map(lambda f: f.name, fields(ResourceUsage)))
+        with output_file.open('w') as resources_file:
+            csv_writer = csv.DictWriter(
+                resources_file, ['algo', 'dataset', 'tool', 'variant', 'cache_mode', *usage_fields])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                if result.usage is None:
+                    continue
+                csv_row = asdict(result.usage)
+                csv_row.update(
+                    {'algo': str(algo), 'dataset': dataset_name, 'tool': str(tool), 'variant': variant,
+                     'cache_mode': result.cache_mode or ''})
+                csv_writer.writerow(csv_row)
+
+    def dump_calibration(self, output_file: Path):
+        """
+        Machine state before and after every calibrated result
+        """
+        state_fields = ['integer_time', 'latency_ns', 'bandwidth', 'frequency_mhz', 'load']
+        with output_file.open('w') as calibration_file:
+            csv_writer = csv.DictWriter(
+                calibration_file, ['algo', 'dataset', 'tool', 'variant', 'drift', 'flagged',
+                                   *map(lambda f: f'before_{f}', state_fields),
+                                   *map(lambda f: f'after_{f}', state_fields)])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                if result.drift is None:
+                    continue
+                csv_row = {
+                    'algo': str(algo),
+                    'dataset': dataset_name,
+                    'tool': str(tool),
+                    'variant': variant,
+                    'drift': f'{result.drift:.4f}',
+                    'flagged': int(result.drift > result.machine.get('tolerance', config.CALIBRATION.tolerance))
+                }
+                for moment in ['before', 'after']:
+                    for state_field in state_fields:
+                        csv_row[f'{moment}_{state_field}'] = result.machine[moment][state_field]
+                csv_writer.writerow(csv_row)
+
+    def dump_launches(self, output_file: Path):
+        """
+        Between-launch and within-launch statistics of the multi-launch results
+        """
+        with output_file.open('w') as launches_file:
+            csv_writer = csv.DictWriter(
+                launches_file, ['algo', 'dataset', 'tool', 'variant', 'launches', 'mean',
+                                'between_sd', 'within_sd', 'ci_low', 'ci_high'])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                nested = result.nested()
+                if nested is None:
+                    continue
+                csv_writer.writerow({
+                    'algo': str(algo),
+                    'dataset': dataset_name,
+                    'tool': str(tool),
+                    'variant': variant,
+                    'launches': nested.launches,
+                    'mean': f'{nested.mean:.3f}',
+                    'between_sd': f'{nested.between_variance ** 0.5:.3f}',
+                    'within_sd': f'{nested.within_variance ** 0.5:.3f}',
+                    'ci_low': f'{nested.ci_low:.3f}',
+                    'ci_high': f'{nested.ci_high:.3f}'
+                })
+
+    def dump_phases(self, output_file: Path):
+        """
+        Milliseconds of the launch phases, averaged over the launches.
+        Phase is empty, if the tool does not report it.
+        """
+        phase_names = list(map(str, Phase))
+        with output_file.open('w') as phases_file:
+            csv_writer = csv.DictWriter(
+                phases_file, ['algo', 'dataset', 'tool', 'variant', 'launches', *phase_names, 'iteration'])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                csv_row = {
+                    'algo': str(algo),
+                    'dataset': dataset_name,
+                    'tool': str(tool),
+                    'variant': variant,
+                    'launches': len(result.launch_sizes()),
+                    'iteration': f'{result.median():.3f}'
+                }
+                for phase, time_ms in result.phase_breakdown().items():
+                    csv_row[str(phase)] = f'{time_ms:.3f}'
+                csv_writer.writerow(csv_row)
+
+    def dump_convergence(self, output_file: Path):
+        """
+        Iterations until convergence and the time per iteration of the iterative algorithms,
+        which are comparable between the tools even if they stop at different points
+        """
+        with output_file.open('w') as convergence_file:
+            csv_writer = csv.DictWriter(
+                convergence_file, ['algo', 'dataset', 'tool', 'variant', 'sweeps', 'median', 'per_sweep'])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                if not result.sweeps:
+                    continue
+                csv_writer.writerow({
+                    'algo': str(algo),
+                    'dataset': dataset_name,
+                    'tool': str(tool),
+                    'variant': variant,
+                    'sweeps': result.sweeps,
+                    'median': f'{result.median():.3f}',
+                    'per_sweep': f'{result.time_per_sweep():.3f}'
+                })
+
+    def dump_verification(self, output_file: Path):
+        """
+        Results of the offline verification, empty if the output was not checked
+        """
+        with output_file.open('w') as verification_file:
+            csv_writer = csv.DictWriter(
+                verification_file, ['algo', 'dataset', 'tool', 'variant', 'verified'])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                csv_writer.writerow({
+                    'algo': str(algo),
+                    'dataset': dataset_name,
+                    'tool': str(tool),
+                    'variant': variant,
+                    'verified': '' if result.verified is None else str(result.verified).lower()
+                })
+
+    def dump_conversion(self, output_file: Path):
+        """
+        Cost of the dataset conversion to the native input format of the tool,
+        paid once per dataset and tool, next to the median time it bought
+        """
+        with output_file.open('w') as conversion_file:
+            csv_writer = csv.DictWriter(
+                conversion_file, ['algo', 'dataset', 'tool', 'variant', 'format', 'conversion_s', 'read_ms', 'median'])
+            csv_writer.writeheader()
+            for algo, dataset_name, tool, variant, result in self.measurements_list():
+                if result.input_format is None:
+                    continue
+                read = result.phase_breakdown().get(Phase.read)
+                csv_writer.writerow({
+                    'algo': str(algo),
+                    'dataset': dataset_name,
+                    'tool': str(tool),
+                    'variant': variant,
+                    'format': result.input_format,
+                    'conversion_s': f'{result.conversion_time:.3f}',
+                    'read_ms': '' if read is None else f'{read:.3f}',
+                    'median': f'{result.median():.3f}'
+                })
+
+    def dump_scaling(self, output_file: Path):
+        """
+        Speedup and parallel efficiency of the thread-count sweep.
+        Baseline is the run with the smallest number of threads.
+        """
+        groups: Dict[Tuple[AlgorithmName, str, ToolName, Variant], List[ExecutionResult]] = {}
+        for algo, dataset_name, tool, variant, result in self.measurements_list():
+            if result.threads is not None:
+                groups.setdefault((algo, dataset_name, tool, threads.sweep_variant(variant)), []).append(result)
+
+        with output_file.open('w') as scaling_file:
+            csv_writer = csv.DictWriter(
+                scaling_file, ['algo', 'dataset', 'tool', 'variant', 'threads', 'median', 'speedup', 'efficiency'])
+            csv_writer.writeheader()
+            for (algo, dataset_name, tool, variant), results in groups.items():
+                results = sorted(results, key=lambda r: r.threads)
+                base = results[0]
+                for result in results:
+                    speedup = base.median() / result.median()
+                    efficiency = speedup * base.threads / result.threads
+                    csv_writer.writerow({
+                        'algo': str(algo),
+                        'dataset': dataset_name,
+                        'tool': str(tool),
+                        'variant': variant,
+                        'threads': result.threads,
+                        'median': f'{result.median():.3f}',
+                        'speedup': f'{speedup:.3f}',
+                        'efficiency': f'{efficiency:.3f}'
+                    })
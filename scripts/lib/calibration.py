@@ -0,0 +1,209 @@
+import os
+import statistics
+import threading
+import time
+
+from array import array
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Optional
+
+import config
+import lib.util as util
+
+from drivers.driver import ExecutionResult
+
+
+CPUS_PATH = Path('/sys/devices/system/cpu')
+
+# Repetitions of every kernel after one warm-up run: the median one is taken
+REPEATS = 11
+
+
+@dataclass
+class MachineState:
+    """
+    Calibration kernel times and system state at one moment
+    """
+    # Seconds of the integer arithmetic kernel
+    integer_time: float
+    # Nanoseconds of the dependent random memory access
+    latency_ns: float
+    # Bytes per second of the memory copy
+    bandwidth: float
+    # Mean current frequency of the cpus in MHz (None if cpufreq is not available)
+    frequency_mhz: Optional[float]
+    # 1-minute load average (None if not available)
+    load: Optional[float]
+
+    def brief_str(self) -> str:
+        frequency = '' if self.frequency_mhz is None else f', freq={self.frequency_mhz:.0f}MHz'
+        load = '' if self.load is None else f', load={self.load:.2f}'
+        return f'int={self.integer_time * 1e3:.1f}ms, lat={self.latency_ns:.1f}ns, bw={self.bandwidth / 1e9:.2f}GB/s{frequency}{load}'
+
+
+def print_status(status: str, *args):
+    util.print_status('calibration', status, *args)
+
+
+def integer_kernel(ops: int) -> float:
+    start = time.perf_counter()
+    x = 88172645463325252
+    for _ in range(ops):
+        # xorshift64
+        x ^= (x << 13) & 0xFFFFFFFFFFFFFFFF
+        x ^= x >> 7
+        x ^= (x << 17) & 0xFFFFFFFFFFFFFFFF
+    return time.perf_counter() - start
+
+
+def make_chain(size: int) -> array:
+    """
+    Single cycle over all elements in a cache-hostile order: full-period
+    linear congruential generator modulo the power of two (Hull-Dobell)
+    """
+    if size & (size - 1):
+        raise Exception(f'Size of the latency chain must be a power of two, got {size}')
+    mask = size - 1
+    return array('i', ((v * 1103515245 + 12345) & mask for v in range(size)))
+
+
+def latency_kernel(chain: array, steps: int) -> float:
+    start = time.perf_counter()
+    v = 0
+    for _ in range(steps):
+        v = chain[v]
+    return (time.perf_counter() - start) / steps * 1e9
+
+
+def stream_kernel(source: bytearray, target: bytearray) -> float:
+    start = time.perf_counter()
+    target[:] = source
+    return len(source) / (time.perf_counter() - start)
+
+
+def repeated(kernel: Callable[[], float]) -> float:
+    """
+    :return: Median result of the kernel, the warm-up run (cold caches and pages) is dropped
+    """
+    kernel()
+    return statistics.median(kernel() for _ in range(REPEATS))
+
+
+def read_frequency() -> Optional[float]:
+    frequencies = []
+    for path in CPUS_PATH.glob('cpu[0-9]*/cpufreq/scaling_cur_freq'):
+        try:
+            frequencies.append(int(path.read_text()) / 1000)
+        except (OSError, ValueError):
+            continue
+    return statistics.mean(frequencies) if frequencies else None
+
+
+def read_load() -> Optional[float]:
+    if not hasattr(os, 'getloadavg'):
+        return None
+    return os.getloadavg()[0]
+
+
+class Calibrator:
+    """
+    Runs the calibration kernels. Buffers are allocated once and reused.
+
+    Kernels are pure Python, so samples of the concurrent cells would compete
+    for the GIL: sampling is serialized. The noise floor of the kernels is
+    measured once on the idle machine, with back-to-back samples.
+    """
+
+    def __init__(self):
+        calibration = config.CALIBRATION
+        self.chain = make_chain(calibration.latency_size)
+        self.source = bytearray(os.urandom(1 << 16)) * (calibration.stream_size >> 16)
+        self.target = bytearray(len(self.source))
+        self.sample_lock = threading.Lock()
+        self.noise_floor = self.measure_noise_floor()
+
+    def sample(self) -> MachineState:
+        calibration = config.CALIBRATION
+        with self.sample_lock:
+            return MachineState(
+                integer_time=repeated(lambda: integer_kernel(calibration.integer_ops)),
+                latency_ns=repeated(lambda: latency_kernel(self.chain, calibration.latency_steps)),
+                bandwidth=repeated(lambda: stream_kernel(self.source, self.target)),
+                frequency_mhz=read_frequency(),
+                load=read_load())
+
+    def measure_noise_floor(self) -> float:
+        """
+        :return: Largest drift between the back-to-back samples
+        """
+        calibration = config.CALIBRATION
+        samples = [self.sample() for _ in range(calibration.noise_samples)]
+        floor = max(drift(before, after) for before, after in zip(samples, samples[1:]))
+        print_status('noise floor', f'{floor:.3f}', samples[-1].brief_str())
+        if calibration.noise_factor * floor > calibration.max_tolerance:
+            print_status('unreliable',
+                         f'noise floor {floor:.3f} is too high for the drift check: tolerance is capped '
+                         f'at {calibration.max_tolerance}, so the kernel noise may be flagged as drift')
+        return floor
+
+    def tolerance(self) -> float:
+        """
+        :return: Drift tolerance, not below the noise of the kernels themselves, but not above `max_tolerance`
+        """
+        calibration = config.CALIBRATION
+        raised = max(calibration.tolerance, calibration.noise_factor * self.noise_floor)
+        return min(raised, max(calibration.tolerance, calibration.max_tolerance))
+
+
+def drift(before: MachineState, after: MachineState) -> float:
+    """
+    :return: Largest relative change of the kernel speed and the cpu frequency
+    """
+    changes = [
+        abs(after.integer_time - before.integer_time) / before.integer_time,
+        abs(after.latency_ns - before.latency_ns) / before.latency_ns,
+        abs(after.bandwidth - before.bandwidth) / before.bandwidth
+    ]
+    if before.frequency_mhz and after.frequency_mhz:
+        changes.append(abs(after.frequency_mhz - before.frequency_mhz) / before.frequency_mhz)
+    return max(changes)
+
+
+_calibrator: Optional[Calibrator] = None
+_lock = threading.Lock()
+
+
+def get_calibrator() -> Calibrator:
+    global _calibrator
+    with _lock:
+        if _calibrator is None:
+            _calibrator = Calibrator()
+        return _calibrator
+
+
+def calibrated(name: str, run: Callable[[], ExecutionResult]) -> ExecutionResult:
+    """
+    Sample the machine state before and after the run. If it drifted beyond
+    the tolerance (see `Calibrator.tolerance`), the run is repeated up to
+    `max_reruns` times; the last result is kept and flagged with its drift.
+    """
+    calibration = config.CALIBRATION
+    calibrator = get_calibrator()
+    tolerance = calibrator.tolerance()
+    attempt = 0
+    while True:
+        before = calibrator.sample()
+        result = run()
+        after = calibrator.sample()
+        result.drift = drift(before, after)
+        result.machine = {'before': asdict(before), 'after': asdict(after), 'tolerance': tolerance}
+        print_status(name, f'drift={result.drift:.3f}',
+                     f'before: {before.brief_str()}', f'after: {after.brief_str()}')
+        if result.drift <= tolerance or attempt >= calibration.max_reruns:
+            if result.drift > tolerance:
+                print_status(name, 'flagged', f'drift {result.drift:.3f} > {tolerance:.3f}')
+            return result
+        attempt += 1
+        print_status(name, 'rerun', f'drift {result.drift:.3f} > {tolerance:.3f}',
+                     f'attempt {attempt}/{calibration.max_reruns}')
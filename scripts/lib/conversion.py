@@ -0,0 +1,118 @@
+import copy
+import json
+import os
+import threading
+import time
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import config
+import lib.reference as reference
+import lib.util as util
+
+from lib.dataset import Dataset
+from lib.tool import ToolName
+
+
+"""
+Conversion of the Matrix Market datasets to the native input formats of the
+tools. Converted files are cached in `config.CONVERTED_FOLDER` together with
+the stamp of the source file and the conversion time, so the conversion is
+done once and its cost is still reported by the later runs.
+"""
+
+_lock = threading.Lock()
+
+
+@dataclass
+class Conversion:
+    """
+    Converted input of the tool
+    """
+    # Suffix of the converted file (without the dot)
+    format: str
+    path: Path
+    # Seconds, spent on the conversion, when the cached file was made
+    seconds: float
+
+
+@dataclass
+class Converter:
+    format: str
+    convert: Callable[[Path, Path], None]
+
+
+def print_status(status: str, *args):
+    util.print_status('conversion', status, *args)
+
+
+def lagraph_convert(source: Path, target: Path):
+    """
+    Serialized GraphBLAS matrix, made by the LaGraph `mtx2bin_demo`
+    """
+    tool_config = config.TOOL_CONFIG[ToolName.lagraph]
+    util.check_call([str(tool_config.build / tool_config.config.mtx2bin), str(source), str(target)])
+
+
+def scipy_convert(source: Path, target: Path):
+    """
+    SciPy CSR matrix in the `.npz` archive
+    """
+    reference.require()
+    reference.sparse.save_npz(target, reference.build(reference.read(source)), compressed=False)
+
+
+# Tools, which read a faster format than the Matrix Market text
+CONVERTERS: Dict[ToolName, Converter] = {
+    ToolName.lagraph: Converter('grb', lagraph_convert),
+    ToolName.scipy: Converter('npz', scipy_convert)
+}
+
+
+def source_stamp(path: Path) -> Dict:
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def convert(tool: ToolName, dataset: Dataset) -> Optional[Conversion]:
+    """
+    :return: Converted input of the tool (made if it is missing or outdated), None if the tool reads .mtx only
+    """
+    converter = CONVERTERS.get(tool)
+    if converter is None:
+        return None
+    target = config.CONVERTED_FOLDER / str(tool) / f'{dataset.name}.{converter.format}'
+    stamp_path = target.with_name(target.name + '.json')
+    with _lock:
+        stamp = source_stamp(dataset.path)
+        if target.exists() and stamp_path.exists():
+            with stamp_path.open('r') as stamp_file:
+                cached = json.load(stamp_file)
+            if cached['source'] == stamp:
+                return Conversion(converter.format, target, cached['seconds'])
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        print_status(f'{tool} {dataset.name}', 'start', f'{dataset.path} -> {target}')
+        start = time.perf_counter()
+        converter.convert(dataset.path, target)
+        seconds = time.perf_counter() - start
+        print_status(f'{tool} {dataset.name}', 'finish', f'{seconds:.2f}s')
+        with stamp_path.open('w') as stamp_file:
+            json.dump({'source': stamp, 'seconds': seconds}, stamp_file, indent=2)
+        return Conversion(converter.format, target, seconds)
+
+
+def converted(tool: ToolName, dataset: Dataset) -> Tuple[Dataset, Optional[Conversion]]:
+    """
+    :return: Dataset to pass to the tool (the converted copy, if enabled and supported) and the conversion
+    """
+    if not config.CONVERSION.enabled:
+        return dataset, None
+    conversion = convert(tool, dataset)
+    if conversion is None:
+        return dataset, None
+    result = copy.copy(dataset)
+    result.path = conversion.path
+    return result, conversion
@@ -3,6 +3,7 @@ import os
 import tempfile
 import shutil
 import json
+import threading
 
 from enum import Enum
 from pathlib import Path
@@ -81,6 +82,9 @@ def download_by_url(url: str, dest: Path):
 
 
 class DatasetPropertiesCache:
+    # Properties file is shared by concurrently running benchmarks
+    lock = threading.RLock()
+
     def load_properties() -> Dict:
         config.DATASETS_PROPERTIES.touch()
         properties: Dict = None
@@ -95,16 +99,18 @@ class DatasetPropertiesCache:
         return properties
 
     def set(dataset_name: str, key: Any, value: Any):
-        properties = DatasetPropertiesCache.load_properties()
-        if dataset_name not in properties:
-            properties[dataset_name] = {}
-        properties[dataset_name][key] = value
+        with DatasetPropertiesCache.lock:
+            properties = DatasetPropertiesCache.load_properties()
+            if dataset_name not in properties:
+                properties[dataset_name] = {}
+            properties[dataset_name][key] = value
 
-        with config.DATASETS_PROPERTIES.open('w') as prop_file:
-            prop_file.write(json.dumps(properties))
+            with config.DATASETS_PROPERTIES.open('w') as prop_file:
+                prop_file.write(json.dumps(properties))
 
     def get(dataset_name: str, key: Any) -> Any:
-        properties = DatasetPropertiesCache.load_properties()
+        with DatasetPropertiesCache.lock:
+            properties = DatasetPropertiesCache.load_properties()
 
         if dataset_name not in properties or key not in properties[dataset_name]:
             return None
@@ -112,12 +118,13 @@ class DatasetPropertiesCache:
         return properties[dataset_name][key]
 
     def get_or_eval(dataset_name: str, key: Any, get_value: Callable):
-        cached_value = DatasetPropertiesCache.get(dataset_name, key)
-        if cached_value is not None:
-            return cached_value
-        value = get_value()
-        DatasetPropertiesCache.set(dataset_name, key, value)
-        return value
+        with DatasetPropertiesCache.lock:
+            cached_value = DatasetPropertiesCache.get(dataset_name, key)
+            if cached_value is not None:
+                return cached_value
+            value = get_value()
+            DatasetPropertiesCache.set(dataset_name, key, value)
+            return value
 
 
 def make_dest_path(name: str) -> Path:
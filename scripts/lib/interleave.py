@@ -0,0 +1,128 @@
+import dataclasses
+import random
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import config
+import lib.util as util
+
+from lib.scheduler import Cell
+from drivers.driver import ExecutionResult, is_workload
+
+
+def print_status(status: str, *args):
+    util.print_status('interleave', status, *args)
+
+
+def is_split(cell: Cell) -> bool:
+    """
+    Workload of the traversals runs the sampled sources and ignores the
+    number of iterations, so its cells are run as one round
+    """
+    return not is_workload(cell.algo)
+
+
+@dataclass
+class CellRounds:
+    rounds: int
+    # Results of the finished rounds
+    results: List[ExecutionResult] = field(default_factory=list)
+    # Number of rounds, which finished no iteration
+    failed: int = 0
+
+    def done(self) -> bool:
+        return len(self.results) + self.failed == self.rounds
+
+
+def split_iterations(total: int, rounds: int) -> List[int]:
+    """
+    Split iterations into at most `rounds` batches, as even as possible
+    """
+    rounds = max(1, min(rounds, total))
+    return [total // rounds + (1 if i < total % rounds else 0) for i in range(rounds)]
+
+
+class Interleaver:
+    """
+    Splits iterations of every cell into several rounds, and runs rounds
+    of all tools and algorithms on the same dataset in a seeded random
+    order, so the drift of the machine state does not always penalize
+    the same tool. Round results of the cell are merged into one result,
+    which is marked partial if some rounds failed.
+    """
+
+    def __init__(self, rounds: int, seed: int):
+        if rounds < 1:
+            raise Exception(f'Number of rounds must be positive, got {rounds}')
+        self.rounds = rounds
+        self.rng = random.Random(seed)
+        # Round cell id -> (round cell, original cell)
+        self.round_cells: Dict[int, Tuple[Cell, Cell]] = {}
+        # Original cell id -> its rounds
+        self.progress: Dict[int, CellRounds] = {}
+
+    def cells(self, cells: Iterable[Cell]) -> Iterator[Cell]:
+        # The planner may order the cells across the datasets, so they are
+        # grouped by the dataset, in the order of its first cell
+        groups: Dict[str, List[Cell]] = {}
+        for cell in cells:
+            groups.setdefault(cell.dataset.name, []).append(cell)
+        for dataset_name, group in groups.items():
+            round_cells = []
+            for cell in group:
+                if is_split(cell):
+                    total = cell.iterations or cell.dataset.get_category().iterations()
+                    batches = split_iterations(total, self.rounds)
+                else:
+                    batches = [cell.iterations]
+                self.progress[id(cell)] = CellRounds(len(batches))
+                for iterations in batches:
+                    round_cell = dataclasses.replace(cell, iterations=iterations)
+                    self.round_cells[id(round_cell)] = (round_cell, cell)
+                    round_cells.append(round_cell)
+            self.rng.shuffle(round_cells)
+            print_status(f'dataset {dataset_name}', f'{len(round_cells)} rounds in random order')
+            yield from round_cells
+
+    def round_done(self,
+                   round_cell: Cell,
+                   result: Optional[ExecutionResult],
+                   on_result: Callable[[Cell, ExecutionResult], None]):
+        _, cell = self.round_cells.pop(id(round_cell))
+        progress = self.progress[id(cell)]
+        if result is None:
+            progress.failed += 1
+        else:
+            progress.results.append(result)
+        if not progress.done():
+            return
+        del self.progress[id(cell)]
+        if not progress.results:
+            print_status(str(cell), 'all rounds failed, skipping')
+            return
+        merged = ExecutionResult.merge(progress.results)
+        merged.update_ci(config.ADAPTIVE.confidence)
+        if progress.failed > 0:
+            merged.partial = True
+            print_status(str(cell), f'{progress.failed}/{progress.rounds} rounds failed, keeping the finished ones')
+        on_result(cell, merged)
+
+    def collector(self, on_result: Callable[[Cell, ExecutionResult], None]) -> Callable[[Cell, ExecutionResult], None]:
+        """
+        :return: Callback for the round results, which reports merged
+            result of the cell to `on_result`, when all its rounds finish or fail
+        """
+        def on_round_result(round_cell: Cell, result: ExecutionResult):
+            self.round_done(round_cell, result, on_result)
+
+        return on_round_result
+
+    def failure_collector(self, on_result: Callable[[Cell, ExecutionResult], None]) -> Callable[[Cell], None]:
+        """
+        :return: Callback for the rounds, skipped without a result (see `collector`)
+        """
+        def on_round_skip(round_cell: Cell):
+            self.round_done(round_cell, None, on_result)
+
+        return on_round_skip
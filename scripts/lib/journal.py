@@ -0,0 +1,91 @@
+import json
+import os
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+from lib.tool import ToolName
+from lib.algorithm import AlgorithmName
+from drivers.driver import ExecutionResult
+
+
+JOURNAL_FILE_NAME = 'journal.jsonl'
+
+CellKey = Tuple[AlgorithmName, str, ToolName, str]
+
+
+@dataclass
+class JournalEntry:
+    algo: AlgorithmName
+    dataset: str
+    tool: ToolName
+    result: ExecutionResult
+    variant: str = ''
+
+    def key(self) -> CellKey:
+        return self.algo, self.dataset, self.tool, self.variant
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'algo': str(self.algo),
+            'dataset': self.dataset,
+            'tool': str(self.tool),
+            'variant': self.variant,
+            'result': self.result.to_json()
+        })
+
+    @staticmethod
+    def from_json(line: str) -> 'JournalEntry':
+        data = json.loads(line)
+        return JournalEntry(
+            algo=AlgorithmName(data['algo']),
+            dataset=data['dataset'],
+            tool=ToolName(data['tool']),
+            result=ExecutionResult.from_json(data['result']),
+            variant=data.get('variant', ''))
+
+
+class Journal:
+    """
+    Append-only log of the finished benchmark cells.
+
+    Every entry is written and flushed to the disk as soon as the cell
+    finishes, so results survive crash or kill of the benchmark process
+    and the campaign can be resumed from the output directory.
+    """
+
+    def __init__(self, output: Path):
+        self.path = output / JOURNAL_FILE_NAME
+        self._terminate_last_line()
+
+    def _terminate_last_line(self):
+        # Entry, cut off by the kill, must not be glued to the next one
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with self.path.open('rb+') as journal_file:
+            journal_file.seek(-1, os.SEEK_END)
+            if journal_file.read(1) != b'\n':
+                journal_file.write(b'\n')
+
+    def entries(self) -> List[JournalEntry]:
+        if not self.path.exists():
+            return []
+        entries = []
+        with self.path.open('r') as journal_file:
+            for line in journal_file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(JournalEntry.from_json(line))
+                except json.decoder.JSONDecodeError:
+                    # Last line may be cut off, if the process was killed while writing it
+                    continue
+        return entries
+
+    def append(self, entry: JournalEntry):
+        with self.path.open('a') as journal_file:
+            journal_file.write(entry.to_json() + '\n')
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
@@ -1,6 +1,6 @@
 import random
 
-from typing import List, Tuple, Union, Callable, Type, Optional, FrozenSet, Set
+from typing import Iterator, List, Tuple, Union, Callable, Type, Optional, FrozenSet, Set
 from pathlib import Path
 
 
@@ -31,6 +31,32 @@ def load_header(path: Path) -> Tuple[int, int, int]:
         return n, m, nvals
 
 
+def is_symmetric(path: Path) -> bool:
+    with path.open('r') as file:
+        banner = file.readline().lower()
+    return banner.startswith('%%matrixmarket') and ('symmetric' in banner or 'hermitian' in banner)
+
+
+def iterate_edges(path: Path) -> Iterator[Tuple[int, int]]:
+    """
+    Stream edges (0-based) of the matrix without loading it.
+    Edges of the symmetric matrix are produced in both directions.
+    """
+    symmetric = is_symmetric(path)
+    with path.open('r') as file:
+        line = file.readline()
+        while line.startswith('%'):
+            line = file.readline()
+        for line in file:
+            values = line.split()
+            if len(values) < 2:
+                continue
+            i, j = int(values[0]) - 1, int(values[1]) - 1
+            yield i, j
+            if symmetric and i != j:
+                yield j, i
+
+
 def value_type_of_repr(repr: str) -> MatrixValueType:
     if '.' in repr:
         return float(repr)
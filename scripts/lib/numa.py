@@ -0,0 +1,117 @@
+import json
+import shutil
+
+from dataclasses import dataclass, asdict
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional
+
+import lib.util as util
+
+
+NODES_PATH = Path('/sys/devices/system/node')
+TOPOLOGY_FILE_NAME = 'numa.json'
+
+
+class NumaPolicy(Enum):
+    # Allocate on the node of the cpu, running the thread (kernel default)
+    local = 'local'
+    # Spread pages round-robin over all nodes
+    interleave = 'interleave'
+    # Run on the cpus of one node and allocate on it only
+    bind = 'bind'
+
+    def __str__(self) -> str:
+        return self.value
+
+
+@dataclass
+class NumaNode:
+    id: int
+    cpus: str
+    memory_kb: int
+
+
+@dataclass
+class Placement:
+    """
+    NUMA policy of the tool launch
+    """
+    policy: NumaPolicy
+    # Node of the `bind` policy
+    node: Optional[int] = None
+
+    def __str__(self) -> str:
+        return f'{self.policy}:{self.node}' if self.node is not None else str(self.policy)
+
+    def variant(self) -> str:
+        return f'numa={self}'
+
+    def command(self) -> List[str]:
+        """
+        :return: `numactl` prefix of the tool command
+        """
+        if self.policy == NumaPolicy.local:
+            return ['numactl', '--localalloc']
+        if self.policy == NumaPolicy.interleave:
+            return ['numactl', '--interleave=all']
+        return ['numactl', f'--cpunodebind={self.node}', f'--membind={self.node}']
+
+
+def print_status(status: str, *args):
+    util.print_status('numa', status, *args)
+
+
+def read_topology() -> List[NumaNode]:
+    """
+    :return: Online NUMA nodes, empty if the system does not report them
+    """
+    nodes = []
+    for path in sorted(NODES_PATH.glob('node[0-9]*'), key=lambda p: int(p.name[4:])):
+        memory_kb = 0
+        meminfo = path / 'meminfo'
+        if meminfo.exists():
+            for line in meminfo.read_text().splitlines():
+                # Node 0 MemTotal:  4161272 kB
+                fields = line.split()
+                if len(fields) >= 4 and fields[2] == 'MemTotal:':
+                    memory_kb = int(fields[3])
+        nodes.append(NumaNode(
+            id=int(path.name[4:]),
+            cpus=(path / 'cpulist').read_text().strip(),
+            memory_kb=memory_kb))
+    return nodes
+
+
+def parse_policies(value: str) -> List[NumaPolicy]:
+    """
+    Parse policies of the sweep, for example `local,interleave,bind`
+    """
+    return list(map(NumaPolicy, value.split(',')))
+
+
+def placements(policies: List[NumaPolicy], nodes: List[NumaNode]) -> List[Placement]:
+    """
+    Expand the policies into placements: `bind` is measured on every node.
+
+    Sweep is meaningless on a single-node machine and without `numactl`:
+    no placements are returned then, and the tools run as usual.
+    """
+    if len(nodes) < 2:
+        print_status('sweep', f'{len(nodes)} NUMA node(s), placement sweep is skipped')
+        return []
+    if shutil.which('numactl') is None:
+        print_status('sweep', '`numactl` is not found, placement sweep is skipped')
+        return []
+    result = []
+    for policy in policies:
+        if policy == NumaPolicy.bind:
+            result.extend(Placement(policy, node.id) for node in nodes)
+        else:
+            result.append(Placement(policy))
+    return result
+
+
+def dump_topology(nodes: List[NumaNode], output: Path):
+    with (output / TOPOLOGY_FILE_NAME).open('w') as topology_file:
+        json.dump({'nodes': list(map(asdict, nodes))}, topology_file, indent=2)
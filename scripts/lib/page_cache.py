@@ -0,0 +1,157 @@
+import copy
+import ctypes
+import ctypes.util
+import mmap
+import os
+import shutil
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Set
+
+import config
+import lib.util as util
+
+from lib.dataset import Dataset
+
+
+READ_CHUNK = 1 << 24
+
+_staging_lock = threading.Lock()
+# Copies, used by this process: they take memory until removed
+_staged: Set[Path] = set()
+
+
+def print_status(status: str, *args):
+    util.print_status('page cache', status, *args)
+
+
+def evict(path: Path):
+    """
+    Drop the clean pages of the file from the page cache
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        print_status('cold', 'posix_fadvise is not supported, file is not evicted')
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def preread(path: Path):
+    with open(path, 'rb', buffering=0) as file:
+        while file.read(READ_CHUNK):
+            pass
+
+
+def _libc():
+    name = ctypes.util.find_library('c')
+    if name is None:
+        return None
+    libc = ctypes.CDLL(name, use_errno=True)
+    libc.mmap.restype = ctypes.c_void_p
+    libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+    libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    libc.mlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    libc.munlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    return libc
+
+
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+
+@contextmanager
+def locked(path: Path):
+    """
+    Keep pages of the file resident, as `vmtouch -l` does: the file is
+    mapped read-only and shared, so the page cache pages themselves are
+    locked with `mlock` (not private copies of them) until the context exits.
+    If locking is not possible (e.g. RLIMIT_MEMLOCK is too low), the file is only pre-read.
+    """
+    preread(path)
+    libc = _libc()
+    size = os.path.getsize(path)
+    if libc is None or size == 0:
+        yield
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        address = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+    finally:
+        # The mapping keeps its own reference to the file
+        os.close(fd)
+    if address == MAP_FAILED:
+        print_status('warm', f'mmap failed ({os.strerror(ctypes.get_errno())}), file is pre-read only')
+        yield
+        return
+    try:
+        if libc.mlock(address, size) != 0:
+            print_status('warm', f'mlock failed ({os.strerror(ctypes.get_errno())}), file is pre-read only')
+            yield
+            return
+        try:
+            yield
+        finally:
+            libc.munlock(address, size)
+    finally:
+        libc.munmap(address, size)
+
+
+def stage(dataset: Dataset) -> Path:
+    """
+    Copy the dataset to the memory-backed STAGING_FOLDER, unless the same copy is already there.
+    Copies are kept for the next launches and removed by `remove_staged`.
+    """
+    staged = config.STAGING_FOLDER / dataset.path.name
+    with _staging_lock:
+        _staged.add(staged)
+        source = os.stat(dataset.path)
+        if staged.exists():
+            target = os.stat(staged)
+            if target.st_size == source.st_size and target.st_mtime == source.st_mtime:
+                return staged
+        config.STAGING_FOLDER.mkdir(parents=True, exist_ok=True)
+        print_status('staged', f'{dataset.path} -> {staged}')
+        shutil.copy2(dataset.path, staged)
+        return staged
+
+
+def remove_staged():
+    """
+    Remove the staged copies at the end of the campaign, so they do not hold the memory of /dev/shm
+    """
+    with _staging_lock:
+        for staged in sorted(_staged):
+            staged.unlink(missing_ok=True)
+            print_status('removed', str(staged))
+        _staged.clear()
+        try:
+            config.STAGING_FOLDER.rmdir()
+        except OSError:
+            # Not empty: copies of another campaign
+            pass
+
+
+@contextmanager
+def prepared(dataset: Dataset) -> Iterator[Dataset]:
+    """
+    Bring the dataset file to the state of `config.CACHE_MODE` before the tool launch.
+
+    :return: Dataset to pass to the tool (the staged copy in the `staged` mode)
+    """
+    mode = config.CACHE_MODE
+    if mode == config.CacheMode.cold:
+        evict(dataset.path)
+        yield dataset
+    elif mode == config.CacheMode.warm:
+        with locked(dataset.path):
+            yield dataset
+    elif mode == config.CacheMode.staged:
+        staged = copy.copy(dataset)
+        staged.path = stage(dataset)
+        yield staged
+    else:
+        yield dataset
@@ -0,0 +1,252 @@
+import math
+import re
+import statistics
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import config
+import lib.affinity as affinity
+import lib.util as util
+
+from lib.journal import Journal, CellKey
+from lib.scheduler import Cell
+from lib.interleave import is_split, split_iterations
+from drivers.driver import Driver, ExecutionResult, is_workload
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse duration like `4h`, `1h30m`, `90s` or `600` (seconds)
+
+    :return: duration in seconds
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {'h': 3600, 'm': 60, 's': 1}
+    parts = re.findall(r'(\d+(?:\.\d+)?)([hms])', value)
+    if not parts or ''.join(n + u for n, u in parts) != value:
+        raise ValueError(f'Can not parse duration `{value}`, expected e.g. 4h, 1h30m, 90s')
+    return sum(float(n) * units[u] for n, u in parts)
+
+
+@dataclass
+class CellEstimate:
+    # Launch and load time of the single tool launch in seconds
+    fixed: float
+    # Time of the single iteration in seconds
+    per_iteration: float
+    # True if estimated from the previous results, False if from the edge count
+    from_history: bool
+
+    def launch_time(self, iterations: int) -> float:
+        return self.fixed + self.per_iteration * iterations
+
+
+@dataclass
+class PlannedCell:
+    cell: Cell
+    iterations: int
+    estimate: CellEstimate
+    # Seconds of the cell with all its launches and rounds
+    seconds: float
+    # Share of the campaign wall-clock time: cells run concurrently with `--jobs`
+    wall_time: float
+
+    def time(self) -> float:
+        return self.wall_time
+
+
+@dataclass
+class Plan:
+    cells: List[PlannedCell]
+    # Cells, which do not fit into the budget
+    skipped: List[Cell]
+
+    def total_time(self) -> float:
+        return sum(map(PlannedCell.time, self.cells))
+
+
+def estimate_from_result(result: ExecutionResult) -> CellEstimate:
+    per_iteration = result.median() / 1000
+    # Discarded warm-up iterations are not in the times, but they took the wall time
+    iterations_time = sum(result.times) / 1000 + per_iteration * result.discarded
+    launches = max(1, len(result.launch_sizes()))
+    fixed = max(0.0, result.wall_time - iterations_time) / launches
+    return CellEstimate(fixed, per_iteration, True)
+
+
+def load_history(output_dir: Path) -> Dict[CellKey, List[CellEstimate]]:
+    """
+    Collect estimates of the cells from all previous results in the output folder
+    """
+    history: Dict[CellKey, List[CellEstimate]] = {}
+    if not output_dir.exists():
+        return history
+    runs = set(path.resolve() for path in output_dir.iterdir() if path.is_dir())
+    for run in runs:
+        for entry in Journal(run).entries():
+            if entry.result.wall_time is None or entry.result.iterations() == 0:
+                continue
+            history.setdefault(entry.key(), []).append(
+                estimate_from_result(entry.result))
+    return history
+
+
+class Planner:
+    """
+    Chooses cells, their order and number of iterations, so that
+    the campaign fits into the time budget.
+
+    Cells are taken from the cheapest to the most expensive one, each
+    with the minimal number of iterations, while they fit into the budget.
+    Time left is spent to increase the number of iterations of all taken
+    cells towards the number by the dataset size.
+
+    Cost of the cell includes every launch (`config.LAUNCHES` per round of
+    `--rounds`) with its discarded warm-up iterations. Budget is the wall-clock
+    time: with `--jobs` each cell takes its share of the concurrently running ones.
+    """
+
+    def __init__(self,
+                 history: Dict[CellKey, List[CellEstimate]],
+                 rounds: Optional[int] = None,
+                 jobs: int = 1):
+        self.history = history
+        self.rounds = rounds
+        self.jobs = jobs
+        self.cpus = len(affinity.available_cpus())
+
+    def estimate(self, cell: Cell) -> CellEstimate:
+        key: CellKey = (cell.algo, cell.dataset.name, cell.driver.tool_name(), cell.variant)
+        estimates = self.history.get(key)
+        if estimates:
+            return CellEstimate(
+                statistics.median(map(lambda e: e.fixed, estimates)),
+                statistics.median(map(lambda e: e.per_iteration, estimates)),
+                True)
+        edges = cell.dataset.get_edges()
+        planner = config.PLANNER
+        return CellEstimate(
+            planner.launch_time + planner.load_time_per_edge * edges,
+            planner.iteration_time_per_edge * edges,
+            False)
+
+    def seconds(self, cell: Cell, estimate: CellEstimate, iterations: int) -> float:
+        """
+        :return: Time of the cell: every round launches the tool `config.LAUNCHES` times,
+            each launch runs the iterations of the round and the discarded ones
+        """
+        if is_workload(cell.algo):
+            return self.workload_seconds(cell, estimate)
+        warm_up = config.WARM_UP
+        discard = warm_up.discard if warm_up.policy == config.WarmUpPolicy.discard else 0
+        rounds = 1
+        if self.rounds is not None and is_split(cell):
+            rounds = len(split_iterations(iterations, self.rounds))
+        launches = config.LAUNCHES * rounds
+        return launches * estimate.launch_time(discard) + config.LAUNCHES * estimate.per_iteration * iterations
+
+    @staticmethod
+    def workload_seconds(cell: Cell, estimate: CellEstimate) -> float:
+        """
+        :return: Time of the workload cell: one query per sampled source, the iterations are ignored.
+            The tool is launched per batch of sources, or per source if its driver does not batch them.
+        """
+        workload = config.WORKLOAD
+        if type(cell.driver).run_sources is Driver.run_sources:
+            launches = workload.sources
+        else:
+            launches = math.ceil(workload.sources / workload.batch)
+        return launches * estimate.fixed + estimate.per_iteration * workload.sources
+
+    def slots(self, cell: Cell) -> int:
+        """
+        :return: Number of cells like this one, which the scheduler runs concurrently
+        """
+        if cell.cores is None:
+            return 1
+        return max(1, min(self.jobs, self.cpus // max(1, min(cell.cores, self.cpus))))
+
+    def wall_time(self, cell: Cell, estimate: CellEstimate, iterations: int) -> float:
+        return self.seconds(cell, estimate, iterations) / self.slots(cell)
+
+    def planned(self, cell: Cell, estimate: CellEstimate, iterations: int) -> PlannedCell:
+        seconds = self.seconds(cell, estimate, iterations)
+        return PlannedCell(cell, iterations, estimate, seconds, seconds / self.slots(cell))
+
+    def plan(self, cells: List[Cell], budget: float = None) -> Plan:
+        desired: Dict[int, int] = {}
+        candidates: List[Tuple[Cell, CellEstimate]] = []
+        for cell in cells:
+            desired[id(cell)] = cell.iterations or cell.dataset.get_category().iterations()
+            candidates.append((cell, self.estimate(cell)))
+
+        if budget is None:
+            return Plan([self.planned(cell, estimate, desired[id(cell)])
+                         for cell, estimate in candidates], [])
+
+        def min_iterations(cell: Cell) -> int:
+            return min(config.PLANNER.min_iterations, desired[id(cell)])
+
+        candidates.sort(key=lambda c: self.wall_time(c[0], c[1], min_iterations(c[0])))
+
+        taken: List[Tuple[Cell, CellEstimate]] = []
+        skipped: List[Cell] = []
+        spent = 0.0
+        for cell, estimate in candidates:
+            cost = self.wall_time(cell, estimate, min_iterations(cell))
+            if spent + cost <= budget:
+                taken.append((cell, estimate))
+                spent += cost
+            else:
+                skipped.append(cell)
+
+        def iterations(cell: Cell, share: float) -> int:
+            low = min_iterations(cell)
+            return low + int((desired[id(cell)] - low) * share)
+
+        def total(share: float) -> float:
+            return sum(self.wall_time(c, e, iterations(c, share)) for c, e in taken)
+
+        # Largest share of the desired iterations, which fits into the budget
+        low, high = 0.0, 1.0
+        if total(high) <= budget:
+            low = high
+        for _ in range(30):
+            if low == high:
+                break
+            middle = (low + high) / 2
+            if total(middle) <= budget:
+                low = middle
+            else:
+                high = middle
+
+        return Plan([self.planned(cell, estimate, iterations(cell, low))
+                     for cell, estimate in taken], skipped)
+
+
+def print_plan(plan: Plan):
+    def print_status(status: str, *args):
+        util.print_status('plan', status, *args)
+
+    start = datetime.now()
+    elapsed = 0.0
+    for planned in plan.cells:
+        elapsed += planned.time()
+        source = 'history' if planned.estimate.from_history else 'edges'
+        print_status(str(planned.cell),
+                     f'iterations={planned.iterations}',
+                     f'estimate={planned.seconds:.1f}s ({source})',
+                     f'finish at {start + timedelta(seconds=elapsed):%H:%M:%S}')
+    for cell in plan.skipped:
+        print_status(str(cell), 'does not fit into the budget, skipped')
+    print_status('total',
+                 f'{len(plan.cells)} cells, {len(plan.skipped)} skipped',
+                 f'estimate={timedelta(seconds=round(plan.total_time()))}',
+                 f'predicted finish at {start + timedelta(seconds=plan.total_time()):%Y-%m-%d %H:%M:%S}')
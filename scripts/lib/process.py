@@ -0,0 +1,251 @@
+import os
+import shutil
+import subprocess
+import threading
+
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import IO, Callable, Dict, List, Optional
+
+import config
+
+from lib.util import print_status
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: limits are refused and usage is not collected
+    resource = None
+
+
+@dataclass
+class ResourceUsage:
+    """
+    Resources, consumed by the tool processes
+    """
+    # Maximal resident set size in kilobytes
+    max_rss_kb: int = 0
+    # CPU time in seconds
+    user_time: float = 0.0
+    system_time: float = 0.0
+    # Page faults without and with I/O
+    minor_faults: int = 0
+    major_faults: int = 0
+    # Context switches
+    voluntary_switches: int = 0
+    involuntary_switches: int = 0
+
+    @staticmethod
+    def from_rusage(usage) -> 'ResourceUsage':
+        max_rss_kb = usage.ru_maxrss
+        if config.SYSTEM == 'macos':
+            # Reported in bytes on macOS
+            max_rss_kb //= 1024
+        return ResourceUsage(
+            max_rss_kb=max_rss_kb,
+            user_time=usage.ru_utime,
+            system_time=usage.ru_stime,
+            minor_faults=usage.ru_minflt,
+            major_faults=usage.ru_majflt,
+            voluntary_switches=usage.ru_nvcsw,
+            involuntary_switches=usage.ru_nivcsw)
+
+    @staticmethod
+    def total(usages: List['ResourceUsage']) -> Optional['ResourceUsage']:
+        """
+        Sum of the usages of several processes (maximum for the memory)
+        """
+        if not usages:
+            return None
+        result = ResourceUsage()
+        for usage in usages:
+            for field in fields(ResourceUsage):
+                a, b = getattr(result, field.name), getattr(usage, field.name)
+                setattr(result, field.name,
+                        max(a, b) if field.name == 'max_rss_kb' else a + b)
+        return result
+
+    def brief_str(self) -> str:
+        return f'max_rss={self.max_rss_kb / 1024:.1f}MB, user={self.user_time:.2f}s, sys={self.system_time:.2f}s'
+
+
+class UsageRecorder:
+    def __init__(self):
+        self.usages: List[ResourceUsage] = []
+
+    def total(self) -> Optional[ResourceUsage]:
+        return ResourceUsage.total(self.usages)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def record():
+    """
+    Collect resource usage of all processes, launched by
+    the calling thread inside this context
+    """
+    recorder = UsageRecorder()
+    previous = getattr(_local, 'recorder', None)
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+def _record_usage(usage: ResourceUsage):
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.usages.append(usage)
+
+
+@contextmanager
+def environment(variables: Dict[str, str]):
+    """
+    Set additional environment variables for all processes,
+    launched by the calling thread inside this context
+    """
+    previous = getattr(_local, 'environment', {})
+    _local.environment = {**previous, **variables}
+    try:
+        yield
+    finally:
+        _local.environment = previous
+
+
+def _make_env(env: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    variables = getattr(_local, 'environment', {})
+    if not variables:
+        return env
+    return {**(os.environ if env is None else env), **variables}
+
+
+@contextmanager
+def wrapper(prefix: List[str]):
+    """
+    Prepend the command (e.g. `numactl ...`) to all processes,
+    launched by the calling thread inside this context
+    """
+    previous = getattr(_local, 'wrapper', [])
+    _local.wrapper = previous + prefix
+    try:
+        yield
+    finally:
+        _local.wrapper = previous
+
+
+def _make_args(args: List) -> List:
+    return getattr(_local, 'wrapper', []) + list(args)
+
+
+def _make_limits() -> Optional[Callable[[], None]]:
+    """
+    :return: Function, which sets limits from `config.LIMITS` in the child process, or None without limits
+    """
+    limits = config.LIMITS
+    requested = {'RLIMIT_AS': limits.address_space, 'RLIMIT_CPU': limits.cpu_time}
+    requested = {name: value for name, value in requested.items() if value is not None}
+    if not requested:
+        return None
+    if resource is None or not hasattr(resource, 'setrlimit'):
+        raise Exception(f'Limits {", ".join(requested)} are not supported on this platform')
+    # Values are resolved in the parent, the child only calls `setrlimit`
+    values = [(getattr(resource, name), (value, value)) for name, value in requested.items()]
+
+    def apply():
+        for limit, value in values:
+            resource.setrlimit(limit, value)
+
+    return apply
+
+
+def _launch(args, consume: Callable[[IO[bytes]], Optional[bytes]], **kwargs) -> Optional[bytes]:
+    """
+    Run the tool process, passing its stdout to `consume` while it runs.
+    Applies limits from `config.LIMITS` and records resource usage of the process.
+
+    :return: What `consume` returned
+    :raise subprocess.TimeoutExpired: if the process was killed by timeout
+    :raise subprocess.CalledProcessError: if the process exited with non-zero code
+    """
+    timeout = config.LIMITS.timeout
+    kwargs['env'] = _make_env(kwargs.get('env'))
+    measure = resource is not None and hasattr(os, 'wait4')
+
+    # Limits are set in the child before `exec`, so the tool never runs without them
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, preexec_fn=_make_limits(), **kwargs)
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+
+    try:
+        output = consume(process.stdout)
+        process.stdout.close()
+        if measure:
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            _record_usage(ResourceUsage.from_rusage(usage))
+        else:
+            process.wait()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(args, timeout, output)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, args, output)
+
+    return output
+
+
+def check_output(args, **kwargs) -> bytes:
+    """
+    Run the tool process and return its output.
+
+    Works like `subprocess.check_output`, but also applies limits from
+    `config.LIMITS` and records resource usage of the process.
+
+    :raise subprocess.TimeoutExpired: if the process was killed by timeout
+    :raise subprocess.CalledProcessError: if the process exited with non-zero code
+    """
+    args = _make_args(args)
+    print_status('subprocess', 'check_output', *args)
+    return _launch(args, lambda stdout: stdout.read(), **kwargs)
+
+
+def stream_output(args, on_line: Callable[[str], None], **kwargs):
+    """
+    Run the tool process and pass every line of its output to `on_line`
+    as soon as it is printed. Output itself is not kept.
+
+    Tools usually buffer the output to the pipe by blocks, so they are
+    launched through `stdbuf -oL` (if available) to flush it by lines.
+
+    Raises the same exceptions as `check_output` (without the output):
+    lines, consumed before the failure, are already passed to `on_line`.
+    """
+    if shutil.which('stdbuf') is not None:
+        args = ['stdbuf', '-oL', *args]
+    args = _make_args(args)
+    print_status('subprocess', 'stream_output', *args)
+
+    def consume(stdout: IO[bytes]) -> None:
+        for line in stdout:
+            on_line(line.decode('ascii', errors='replace').rstrip('\r\n'))
+
+    _launch(args, consume, **kwargs)
@@ -0,0 +1,199 @@
+from pathlib import Path
+
+try:
+    import numpy as np
+    import scipy.io
+    import scipy.sparse as sparse
+    import scipy.sparse.csgraph as csgraph
+except ImportError:
+    # SciPy is optional: it is needed by the reference tool only
+    np = None
+    sparse = None
+
+
+"""
+Vectorized reference implementations of the benchmark algorithms on the
+SciPy sparse matrices. Matrices are square CSR with the edge weights
+(pattern matrices get weight 1), A[i, j] is the edge from i to j.
+"""
+
+# Distance of the unreachable vertex and the level of the unvisited one
+UNREACHABLE = float('inf')
+UNVISITED = -1
+
+# Maximal number of the row entries, gathered at once by the triangle count
+GATHER_CHUNK = 1 << 24
+
+
+def available() -> bool:
+    return sparse is not None
+
+
+def require():
+    if not available():
+        raise Exception('SciPy and NumPy are required by the reference tool, install them with `pip install scipy`')
+
+
+def read(path: Path):
+    """
+    :return: COO matrix of the Matrix Market file (symmetric matrices are expanded),
+        or CSR matrix of the converted `.npz` file
+    """
+    if path.suffix == '.npz':
+        return sparse.load_npz(path)
+    return scipy.io.mmread(str(path))
+
+
+def build(coo):
+    """
+    :return: CSR matrix with the duplicates summed and the float64 weights
+    """
+    matrix = sparse.csr_matrix(coo, dtype=np.float64)
+    matrix.sum_duplicates()
+    return matrix
+
+
+def gather_rows(matrix, rows):
+    """
+    :return: Column indices and values of the rows, and the row of every entry
+    """
+    starts = matrix.indptr[rows]
+    lengths = matrix.indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    # Entry k of the output is at position k - (output start of its row) + (matrix start of its row)
+    output_starts = np.cumsum(lengths) - lengths
+    positions = np.arange(total) + np.repeat(starts - output_starts, lengths)
+    row_of_entry = np.repeat(np.arange(len(rows)), lengths)
+    return matrix.indices[positions], matrix.data[positions], row_of_entry
+
+
+def chunks(lengths):
+    """
+    Split the consecutive items into slices with at most GATHER_CHUNK total length (at least one item each)
+    """
+    ends = np.cumsum(lengths)
+    start = 0
+    while start < len(lengths):
+        base = ends[start - 1] if start > 0 else 0
+        stop = max(start + 1, int(np.searchsorted(ends, base + GATHER_CHUNK, side='right')))
+        yield slice(start, stop)
+        start = stop
+
+
+def bfs(matrix, source: int):
+    """
+    Level-synchronous BFS: the next frontier is the product of the sparse
+    frontier vector and the matrix (boolean semiring), masked by the visited vertices.
+
+    :return: Level of every vertex (0 for the source, UNVISITED for the unreachable)
+    """
+    levels = np.full(matrix.shape[0], UNVISITED, dtype=np.int64)
+    levels[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    while frontier.size > 0:
+        level += 1
+        neighbours, _, _ = gather_rows(matrix, frontier)
+        neighbours = np.unique(neighbours)
+        frontier = neighbours[levels[neighbours] == UNVISITED]
+        levels[frontier] = level
+    return levels
+
+
+def sssp(matrix, source: int):
+    """
+    Bellman-Ford with the active set: only the edges of the vertices,
+    whose distance changed in the previous round, are relaxed.
+    Weights are expected to be non-negative.
+
+    :return: Distance of every vertex (UNREACHABLE for the unreachable)
+    """
+    distances = np.full(matrix.shape[0], UNREACHABLE)
+    distances[source] = 0.0
+    active = np.array([source], dtype=np.int64)
+    while active.size > 0:
+        targets, weights, rows = gather_rows(matrix, active)
+        candidates = np.full(matrix.shape[0], UNREACHABLE)
+        np.minimum.at(candidates, targets, distances[active][rows] + weights)
+        active = np.flatnonzero(candidates < distances)
+        distances[active] = candidates[active]
+    return distances
+
+
+def lower_triangle(matrix):
+    """
+    :return: Strictly lower triangle of the symmetrized pattern of the matrix (CSR with sorted indices)
+    """
+    pattern = matrix.copy()
+    pattern.data[:] = 1.0
+    symmetric = ((pattern + pattern.T) > 0).astype(np.float64)
+    lower = sparse.tril(symmetric, k=-1, format='csr')
+    lower.sort_indices()
+    return lower
+
+
+def tc(lower) -> int:
+    """
+    Triangle count of the undirected graph as sum(L .* (L @ L^T)), where L is
+    the strictly lower triangle (see `lower_triangle`). The product is computed
+    on the pattern of L only: for every entry (i, j) the shorter of the rows
+    i and j is gathered, and its vertices are looked up in the other row
+    (binary search over the sorted entry keys i * n + j), chunk by chunk.
+    """
+    n = lower.shape[0]
+    degree = np.diff(lower.indptr)
+    rows = np.repeat(np.arange(n, dtype=np.int64), degree)
+    columns = lower.indices.astype(np.int64)
+    keys = rows * n + columns
+    shorter = degree[columns] < degree[rows]
+    gathered = np.where(shorter, columns, rows)
+    other = np.where(shorter, rows, columns)
+    triangles = 0
+    for part in chunks(degree[gathered]):
+        neighbours, _, entry = gather_rows(lower, gathered[part])
+        queries = other[part][entry] * n + neighbours
+        positions = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+        triangles += int(np.count_nonzero(keys[positions] == queries))
+    return triangles
+
+
+def cc(matrix):
+    """
+    :return: Component label of every vertex (components of the directed graph are the weakly connected ones)
+    """
+    _, labels = csgraph.connected_components(matrix, directed=True, connection='weak')
+    return labels
+
+
+def pagerank_matrix(matrix):
+    """
+    :return: Transposed pattern of the matrix and the out-degrees of the vertices
+    """
+    pattern = matrix.copy()
+    pattern.data[:] = 1.0
+    return pattern.T.tocsr(), np.diff(pattern.indptr).astype(np.float64)
+
+
+def pagerank(transposed, out_degree, damping: float, tolerance: float, max_iterations: int):
+    """
+    Power iteration: rank of the dangling vertices is spread uniformly.
+    Stops when the largest change of a vertex rank is below the tolerance,
+    as the per-vertex threshold of Gunrock does.
+
+    :return: Ranks (summing up to 1) and the number of iterations
+    """
+    n = transposed.shape[0]
+    ranks = np.full(n, 1.0 / n)
+    dangling = out_degree == 0
+    inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    teleport = (1.0 - damping) / n
+    iteration = 0
+    while iteration < max_iterations:
+        iteration += 1
+        spread = ranks[dangling].sum() / n
+        new_ranks = teleport + damping * (transposed @ (ranks * inverse_degree) + spread)
+        change = np.abs(new_ranks - ranks).max()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks, iteration
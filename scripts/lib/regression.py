@@ -0,0 +1,259 @@
+import subprocess
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+import lib.stats as stats
+import lib.util as util
+
+from build.build import build_tool
+from lib.algorithm import AlgorithmName
+from lib.dataset import Dataset
+from lib.tool import ToolName
+from drivers.driver import ExecutionResult
+from drivers.registry import get_driver
+
+
+class Verdict(Enum):
+    good = 'good'
+    bad = 'bad'
+    # Commit does not build, as `git bisect skip`
+    skip = 'skip'
+
+    def __str__(self):
+        return self.value
+
+
+@dataclass
+class CommitMeasurement:
+    commit: str
+    # None for the skipped commit
+    result: Optional[ExecutionResult]
+    verdict: Optional[Verdict] = None
+
+
+def print_status(status: str, *args):
+    util.print_status('bisect', status, *args)
+
+
+def git(repo: Path, *args) -> str:
+    return util.check_output(['git', *args], cwd=repo).decode().strip()
+
+
+def commits_between(repo: Path, good: str, bad: str) -> List[str]:
+    """
+    :return: Full hashes of the commits from `good` to `bad` (both included), oldest first
+    """
+    good_hash = git(repo, 'rev-parse', f'{good}^{{commit}}')
+    bad_hash = git(repo, 'rev-parse', f'{bad}^{{commit}}')
+    try:
+        git(repo, 'merge-base', '--is-ancestor', good_hash, bad_hash)
+    except subprocess.CalledProcessError:
+        raise Exception(f'Can not bisect: {good} is not an ancestor of {bad}')
+    path = git(repo, 'rev-list', '--reverse', '--ancestry-path', f'{good_hash}..{bad_hash}').split()
+    return [good_hash] + path
+
+
+def describe(repo: Path, commit: str) -> str:
+    return git(repo, 'log', '-1', '--format=%h %s', commit)
+
+
+def probe_order(low: int, high: int) -> List[int]:
+    """
+    :return: Indices strictly between `low` and `high`: the middle one first, then its neighbours outwards
+    """
+    middle = (low + high) // 2
+    order = []
+    for distance in range(high - low):
+        for index in (middle + distance, middle - distance):
+            if low < index < high and index not in order:
+                order.append(index)
+    return order
+
+
+def worktree(tool: ToolName, commit: str) -> Path:
+    """
+    Worktree of the tool sources at the commit. Worktrees are kept in
+    `config.BISECT.worktrees`, so the builds are reused by the next bisections.
+    """
+    repo = config.TOOL_CONFIG[tool].sources
+    path = config.BISECT.worktrees / str(tool) / commit
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        print_status(f'commit {commit[:12]}', 'worktree', str(path))
+        git(repo, 'worktree', 'add', '--detach', str(path.absolute()), commit)
+        git(path, 'submodule', 'update', '--init', '--recursive')
+    return path
+
+
+@contextmanager
+def tool_sources(tool: ToolName, sources: Path):
+    """
+    Point the tool configuration (and so the builders and drivers) to other sources
+    """
+    tool_config = config.TOOL_CONFIG[tool]
+    previous_sources, previous_build = tool_config.sources, tool_config.build
+    tool_config.sources = sources
+    tool_config.build = sources / previous_build.relative_to(previous_sources)
+    try:
+        yield
+    finally:
+        tool_config.sources, tool_config.build = previous_sources, previous_build
+
+
+class Bisection:
+    """
+    Finds the first commit of the tool, where the median time of the
+    benchmark exceeds the median of the good commit by more than `threshold`.
+
+    Every commit is measured in rounds of the usual number of iterations,
+    until the confidence interval of its median is entirely above or below
+    the regression limit, or `max_rounds` is reached (then the median decides).
+
+    Commits, which do not build, are skipped as with `git bisect skip`:
+    the search tests their neighbours instead.
+    """
+
+    def __init__(self,
+                 tool: ToolName,
+                 dataset: Dataset,
+                 algo: AlgorithmName,
+                 threshold: float):
+        self.tool = tool
+        self.dataset = dataset
+        self.algo = algo
+        self.threshold = threshold
+        self.driver = get_driver(tool)
+        self.repo = config.TOOL_CONFIG[tool].sources
+        self.commits: List[str] = []
+        self.measurements: Dict[str, CommitMeasurement] = {}
+        self.limit: Optional[float] = None
+        # Range of the first bad commit, if it can not be told because of the skipped commits
+        self.suspects: List[str] = []
+
+    def build(self, commit: str) -> bool:
+        """
+        :return: False if the commit does not build
+        """
+        with tool_sources(self.tool, worktree(self.tool, commit)):
+            try:
+                build_tool(self.tool)
+            except Exception as e:
+                print_status(f'commit {commit[:12]}', 'build failed', repr(e))
+                return False
+        return True
+
+    def measure_round(self, commit: str) -> ExecutionResult:
+        with tool_sources(self.tool, worktree(self.tool, commit)):
+            return self.driver.run(self.dataset, self.algo)
+
+    def measure_baseline(self, measurement: CommitMeasurement) -> CommitMeasurement:
+        """
+        Measure the good commit until its median is known within half of the threshold
+        """
+        bisect_config = config.BISECT
+        for _ in range(bisect_config.max_rounds - 1):
+            rel_ci = stats.relative_median_ci(measurement.result.times, bisect_config.confidence)
+            if rel_ci is not None and rel_ci <= self.threshold / 2:
+                break
+            measurement.result = ExecutionResult.merge(
+                [measurement.result, self.measure_round(measurement.commit)])
+        return measurement
+
+    def measure(self, commit: str) -> CommitMeasurement:
+        measurement = self.measurements.get(commit)
+        if measurement is None:
+            if self.build(commit):
+                measurement = CommitMeasurement(commit, self.measure_round(commit))
+            else:
+                measurement = CommitMeasurement(commit, None, Verdict.skip)
+            self.measurements[commit] = measurement
+        if measurement.verdict == Verdict.skip:
+            print_status(f'commit {commit[:12]}', str(measurement.verdict))
+            return measurement
+        if self.limit is None:
+            return self.measure_baseline(measurement)
+
+        bisect_config = config.BISECT
+        rounds = 1
+        while measurement.verdict is None:
+            ci = stats.median_ci(measurement.result.times, bisect_config.confidence)
+            if ci is not None and ci[0] > self.limit:
+                measurement.verdict = Verdict.bad
+            elif ci is not None and ci[1] < self.limit:
+                measurement.verdict = Verdict.good
+            elif rounds >= bisect_config.max_rounds:
+                measurement.verdict = Verdict.bad if measurement.result.median() > self.limit else Verdict.good
+                print_status(f'commit {commit[:12]}', 'not confident',
+                             f'median CI overlaps the limit after {rounds} rounds, decided by the median')
+            else:
+                rounds += 1
+                measurement.result = ExecutionResult.merge(
+                    [measurement.result, self.measure_round(commit)])
+        print_status(f'commit {commit[:12]}', str(measurement.verdict),
+                     f'median={measurement.result.median():.3f}ms',
+                     f'limit={self.limit:.3f}ms',
+                     f'n={measurement.result.iterations()}')
+        return measurement
+
+    def run(self, good: str, bad: str) -> Optional[str]:
+        """
+        :return: First bad commit, or None if `bad` is not a regression or the
+            first bad commit is among the skipped ones (then they are in `suspects`)
+        """
+        self.commits = commits = commits_between(self.repo, good, bad)
+        print_status(f'{good}..{bad}', f'{len(commits)} commits')
+
+        baseline = self.measure(commits[0])
+        if baseline.verdict == Verdict.skip:
+            raise Exception(f'Can not bisect: good commit {good} does not build')
+        self.limit = baseline.result.median() * (1 + self.threshold)
+        baseline.verdict = Verdict.good
+
+        verdict = self.measure(commits[-1]).verdict
+        if verdict == Verdict.skip:
+            raise Exception(f'Can not bisect: bad commit {bad} does not build')
+        if verdict != Verdict.bad:
+            print_status(bad, 'not a regression',
+                         f'median is within {self.threshold:.1%} of {good}')
+            return None
+
+        low, high = 0, len(commits) - 1
+        while high - low > 1:
+            for index in probe_order(low, high):
+                print_status('search', f'{high - low - 1} commits left',
+                             f'testing {describe(self.repo, commits[index])}')
+                verdict = self.measure(commits[index]).verdict
+                if verdict != Verdict.skip:
+                    break
+            if verdict == Verdict.skip:
+                # Every commit in between is skipped
+                self.suspects = commits[low + 1:high + 1]
+                print_status('search', 'only skipped commits left',
+                             f'first bad commit is one of {len(self.suspects)}')
+                return None
+            if verdict == Verdict.bad:
+                high = index
+            else:
+                low = index
+        return commits[high]
+
+    def print_report(self, first_bad: Optional[str]):
+        baseline = self.measurements[self.commits[0]].result.median()
+        for commit in filter(lambda c: c in self.measurements, self.commits):
+            measurement = self.measurements[commit]
+            if measurement.result is None:
+                print_status('report', f'{describe(self.repo, commit)}', f'{measurement.verdict}')
+                continue
+            median = measurement.result.median()
+            print_status('report', f'{describe(self.repo, commit)}',
+                         f'{measurement.verdict}',
+                         f'median={median:.3f}ms ({median / baseline - 1:+.1%})')
+        if first_bad is not None:
+            print_status('report', 'first bad commit', describe(self.repo, first_bad))
+        for commit in self.suspects:
+            print_status('report', 'possible first bad commit', describe(self.repo, commit))
@@ -0,0 +1,154 @@
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import config
+import lib.affinity as affinity
+import lib.calibration as calibration
+import lib.process as process
+import lib.util as util
+
+from lib.algorithm import AlgorithmName
+from lib.dataset import Dataset
+from drivers.driver import Driver, ExecutionResult
+
+
+@dataclass
+class Cell:
+    """
+    Single independent benchmark unit: one tool running one algorithm on one dataset
+    """
+    dataset: Dataset
+    algo: AlgorithmName
+    driver: Driver
+
+    # Number of cpus, required by the cell (None means the whole machine)
+    cores: Optional[int] = None
+
+    # Name of the tool configuration, if the tool is measured in several ones
+    variant: str = ''
+
+    # Additional environment variables of the tool
+    env: Dict[str, str] = field(default_factory=dict)
+
+    # Command, the tool is launched with (e.g. `numactl` with the placement policy)
+    wrapper: List[str] = field(default_factory=list)
+
+    # Number of threads, the tool is limited to
+    threads: Optional[int] = None
+
+    # Number of iterations to run (None means the driver decides)
+    iterations: Optional[int] = None
+
+    def __str__(self) -> str:
+        variant = f', variant: {self.variant}' if self.variant else ''
+        return f'algo: {self.algo}, dataset: {self.dataset.name}, tool: {str(self.driver.tool_name())}{variant}'
+
+
+def print_status(status: str, *args):
+    util.print_status('scheduler', status, *args)
+
+
+def abort_reason(error: BaseException) -> Tuple[str, str]:
+    """
+    :return: Status and description of the tool failure
+    """
+    if isinstance(error, subprocess.TimeoutExpired):
+        return 'timeout', f'killed after {error.timeout}s'
+    if error.returncode < 0:
+        return 'failed', f'killed by signal {-error.returncode}'
+    return 'failed', f'exit code {error.returncode}'
+
+
+def aborted_result(name: str, error: BaseException) -> Optional[ExecutionResult]:
+    """
+    Report the aborted tool (timeout, limits kill or crash)
+
+    :return: Result of the finished iterations, None if the cell must be skipped
+    """
+    status, reason = abort_reason(error)
+    partial = getattr(error, 'partial', None)
+    if partial is None:
+        print_status(name, status, f'{reason}, skipping')
+        return None
+    print_status(name, status, f'{reason}, keeping {partial.iterations()} finished iterations')
+    return partial
+
+
+class Scheduler:
+    """
+    Runs independent benchmark cells concurrently.
+
+    Each running cell gets an exclusive set of cpus. Cells are started
+    in the order they are given: if the next cell does not fit into the
+    free cpus, scheduler waits until enough of them are released, so
+    cells requiring the whole machine are never starved.
+
+    Results are reported from the calling thread only.
+    """
+
+    def __init__(self, max_parallel: int = 1, cpus: Optional[List[int]] = None):
+        if max_parallel < 1:
+            raise Exception(f'Number of parallel cells must be positive, got {max_parallel}')
+        self.max_parallel = max_parallel
+        self.cpus = cpus if cpus is not None else affinity.available_cpus()
+
+    def cores_required(self, cell: Cell) -> int:
+        if cell.cores is None:
+            return len(self.cpus)
+        return max(1, min(cell.cores, len(self.cpus)))
+
+    def run(self,
+            cells: Iterable[Cell],
+            on_result: Callable[[Cell, ExecutionResult], None],
+            on_skip: Optional[Callable[[Cell], None]] = None):
+        pending: Iterator[Cell] = iter(cells)
+        head: Optional[Cell] = next(pending, None)
+        free: List[int] = list(self.cpus)
+        running: Dict[Future, Tuple[Cell, List[int]]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while head is not None or running:
+                while head is not None and len(running) < self.max_parallel:
+                    required = self.cores_required(head)
+                    if required > len(free):
+                        break
+                    # Build is done before pinning, so it is not limited to the cell cpus
+                    head.driver.ensure_built()
+                    cell_cpus, free = free[:required], free[required:]
+                    print_status(str(head), 'start',
+                                 f'cpus={affinity.cpus_repr(cell_cpus)}')
+                    future = executor.submit(Scheduler._run_cell, head, cell_cpus)
+                    running[future] = (head, cell_cpus)
+                    head = next(pending, None)
+
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    cell, cell_cpus = running.pop(future)
+                    free = sorted(free + cell_cpus)
+                    try:
+                        result = future.result()
+                    except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+                        result = aborted_result(str(cell), e)
+                        if result is None:
+                            if on_skip is not None:
+                                on_skip(cell)
+                            continue
+                        result.threads = cell.threads
+                    print_status(str(cell), 'finish')
+                    on_result(cell, result)
+
+    @staticmethod
+    def _run_cell(cell: Cell, cpus: List[int]) -> ExecutionResult:
+        def run() -> ExecutionResult:
+            return cell.driver.run(cell.dataset, cell.algo, cell.iterations)
+
+        with affinity.pinned(cpus), process.environment(cell.env), process.wrapper(cell.wrapper):
+            if config.CALIBRATION.enabled:
+                result = calibration.calibrated(str(cell), run)
+            else:
+                result = run()
+        result.threads = cell.threads
+        return result
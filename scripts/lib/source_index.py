@@ -0,0 +1,221 @@
+import json
+import os
+import random
+import threading
+
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import config
+import lib.matrix as matrix
+import lib.util as util
+
+from lib.dataset import Dataset
+
+
+INDEX_VERSION = 1
+
+META_FILE = 'meta.json'
+LABELS_FILE = 'labels.bin'
+GIANT_FILE = 'giant.bin'
+DEGREES_FILE = 'degrees.bin'
+
+
+@dataclass
+class CandidateSource:
+    # Number of BFS levels, reachable from the source
+    depth: int
+    # Number of vertices, reachable from the source
+    reach: int
+
+
+@dataclass
+class SourceIndex:
+    """
+    Traversal-source index of the dataset
+
+    Vertices are 0-based. Components are weakly connected components.
+    """
+    # Component label of every vertex
+    labels: array
+    # Vertices of the largest component
+    giant: array
+    # Out-degree of every vertex
+    degrees: array
+    # BFS depth and reach of the candidate sources
+    candidates: Dict[int, CandidateSource]
+
+    def n_vertices(self) -> int:
+        return len(self.degrees)
+
+    def max_degree_source(self) -> int:
+        return max(self.giant, key=lambda v: self.degrees[v])
+
+    def deepest_source(self) -> int:
+        return max(self.candidates.items(), key=lambda item: (item[1].depth, item[1].reach))[0]
+
+
+def print_status(status: str, *args):
+    util.print_status('source index', status, *args)
+
+
+def index_path(dataset: Dataset) -> Path:
+    return config.DATASETS_INDEX / dataset.name
+
+
+def dataset_stamp(dataset: Dataset) -> Dict:
+    stat = os.stat(dataset.path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'version': INDEX_VERSION}
+
+
+def read_array(path: Path, typecode: str) -> array:
+    values = array(typecode)
+    with path.open('rb') as file:
+        values.frombytes(file.read())
+    return values
+
+
+def write_array(path: Path, values: array):
+    with path.open('wb') as file:
+        values.tofile(file)
+
+
+def find(parents: array, v: int) -> int:
+    root = v
+    while parents[root] != root:
+        root = parents[root]
+    while parents[v] != root:
+        parents[v], v = root, parents[v]
+    return root
+
+
+def bfs_depth(offsets: array, targets: array, source: int) -> CandidateSource:
+    visited = bytearray(len(offsets) - 1)
+    visited[source] = 1
+    frontier = [source]
+    depth = 0
+    reach = 1
+    while True:
+        next_frontier = []
+        for v in frontier:
+            for e in range(offsets[v], offsets[v + 1]):
+                u = targets[e]
+                if not visited[u]:
+                    visited[u] = 1
+                    next_frontier.append(u)
+        if not next_frontier:
+            return CandidateSource(depth=depth, reach=reach)
+        depth += 1
+        reach += len(next_frontier)
+        frontier = next_frontier
+
+
+def build(dataset: Dataset, n_candidates: int) -> SourceIndex:
+    n, _, _ = matrix.load_header(dataset.path)
+
+    print_status(dataset.name, 'components and degrees')
+    degrees = array('i', bytes(4 * n))
+    parents = array('i', range(n))
+    for i, j in matrix.iterate_edges(dataset.path):
+        degrees[i] += 1
+        ri, rj = find(parents, i), find(parents, j)
+        if ri != rj:
+            parents[max(ri, rj)] = min(ri, rj)
+
+    labels = array('i', (find(parents, v) for v in range(n)))
+    sizes: Dict[int, int] = {}
+    for label in labels:
+        sizes[label] = sizes.get(label, 0) + 1
+    giant_label = max(sizes, key=sizes.get)
+    giant = array('i', (v for v in range(n) if labels[v] == giant_label))
+
+    candidates: Dict[int, CandidateSource] = {}
+    if n_candidates > 0:
+        print_status(dataset.name, 'adjacency')
+        offsets = array('q', [0]) * (n + 1)
+        for v in range(n):
+            offsets[v + 1] = offsets[v] + degrees[v]
+        targets = array('i', bytes(4 * offsets[n]))
+        fill = array('q', offsets[:n])
+        for i, j in matrix.iterate_edges(dataset.path):
+            targets[fill[i]] = j
+            fill[i] += 1
+
+        by_degree = sorted(giant, key=lambda v: degrees[v], reverse=True)
+        chosen = by_degree[:(n_candidates + 1) // 2]
+        rng = random.Random(0)
+        rest = by_degree[len(chosen):]
+        chosen += rng.sample(rest, min(n_candidates - len(chosen), len(rest)))
+
+        for source in chosen:
+            candidates[source] = bfs_depth(offsets, targets, source)
+            print_status(dataset.name, f'candidate {source}', candidates[source])
+
+    return SourceIndex(labels, giant, degrees, candidates)
+
+
+def save(path: Path, index: SourceIndex, stamp: Dict):
+    path.mkdir(parents=True, exist_ok=True)
+    write_array(path / LABELS_FILE, index.labels)
+    write_array(path / GIANT_FILE, index.giant)
+    write_array(path / DEGREES_FILE, index.degrees)
+    meta = {
+        'stamp': stamp,
+        'candidates': {str(v): {'depth': c.depth, 'reach': c.reach} for v, c in index.candidates.items()}
+    }
+    # Meta is written last: index without it is treated as missing
+    with (path / META_FILE).open('w') as meta_file:
+        json.dump(meta, meta_file)
+
+
+def load(path: Path, stamp: Dict) -> Optional[SourceIndex]:
+    meta_path = path / META_FILE
+    if not meta_path.exists():
+        return None
+    with meta_path.open('r') as meta_file:
+        meta = json.load(meta_file)
+    if meta.get('stamp') != stamp:
+        return None
+    return SourceIndex(
+        labels=read_array(path / LABELS_FILE, 'i'),
+        giant=read_array(path / GIANT_FILE, 'i'),
+        degrees=read_array(path / DEGREES_FILE, 'i'),
+        candidates={int(v): CandidateSource(**c) for v, c in meta['candidates'].items()})
+
+
+_loaded: Dict[str, SourceIndex] = {}
+_lock = threading.Lock()
+
+
+def get_index(dataset: Dataset) -> SourceIndex:
+    """
+    Load the index of the dataset from the cache, or build and cache it.
+    Index is rebuilt, if the dataset file has changed.
+    """
+    with _lock:
+        if dataset.name in _loaded:
+            return _loaded[dataset.name]
+        path = index_path(dataset)
+        stamp = dataset_stamp(dataset)
+        index = load(path, stamp)
+        if index is None:
+            print_status(dataset.name, 'build', f'-> {path}')
+            index = build(dataset, config.SOURCE_INDEX_CANDIDATES)
+            save(path, index, stamp)
+        _loaded[dataset.name] = index
+        return index
+
+
+def choose_source(dataset: Dataset, policy: config.SourcePolicy) -> int:
+    if policy == config.SourcePolicy.default:
+        return config.DEFAULT_SOURCE
+    index = get_index(dataset)
+    if policy == config.SourcePolicy.max_degree:
+        return index.max_degree_source()
+    if policy == config.SourcePolicy.deepest:
+        if not index.candidates:
+            return index.max_degree_source()
+        return index.deepest_source()
+    raise Exception(f'Unknown source policy {policy}')
@@ -0,0 +1,42 @@
+import random
+import threading
+
+from typing import Dict, List, Tuple
+
+import lib.source_index as source_index
+
+from lib.dataset import Dataset
+
+
+_cache: Dict[Tuple[str, int, int, bool, bool], List[int]] = {}
+_lock = threading.Lock()
+
+
+def sample_sources(dataset: Dataset,
+                   k: int,
+                   seed: int,
+                   degree_weighted: bool,
+                   giant_only: bool = False) -> List[int]:
+    """
+    Sample `k` source vertices (0-based) of the dataset.
+
+    Sampling is seeded, so all tools get the same sources. Vertices are
+    drawn with replacement, uniformly or proportionally to their out-degree
+    (isolated vertices are never drawn then). Degrees and components are
+    taken from the traversal-source index of the dataset.
+    """
+    key = (dataset.name, k, seed, degree_weighted, giant_only)
+    with _lock:
+        if key not in _cache:
+            rng = random.Random(seed)
+            index = source_index.get_index(dataset)
+            population = index.giant if giant_only else range(index.n_vertices())
+            weights = None
+            if degree_weighted:
+                weights = [index.degrees[v] for v in population]
+            _cache[key] = rng.choices(population, weights=weights, k=k)
+        return _cache[key]
+
+
+def batches(sources: List[int], batch: int) -> List[List[int]]:
+    return [sources[i:i + batch] for i in range(0, len(sources), batch)]
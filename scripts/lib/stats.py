@@ -0,0 +1,163 @@
+import math
+import statistics
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+# Above this number of values binomial distribution is approximated by the normal one
+EXACT_CI_MAX_VALUES = 1000
+
+
+def median_ci(values: List[float], confidence: float = 0.95) -> Optional[Tuple[float, float]]:
+    """
+    Distribution-free confidence interval of the median.
+
+    Interval is formed by the order statistics x(k), x(n - k + 1), where
+    k is the largest number such that the coverage of the interval is
+    still at least `confidence`.
+
+    :return: (lower, upper) bounds, or None if there are too few values
+        to reach the confidence
+    """
+    n = len(values)
+    alpha = 1.0 - confidence
+    k = 0
+    if n <= EXACT_CI_MAX_VALUES:
+        # P(X <= k - 1) for X ~ Binomial(n, 1/2), accumulated incrementally
+        total = 2 ** n
+        cumulative = 0
+        for candidate in range(1, n // 2 + 1):
+            cumulative += math.comb(n, candidate - 1)
+            if 2 * cumulative / total > alpha:
+                break
+            k = candidate
+    else:
+        z = statistics.NormalDist().inv_cdf(1.0 - alpha / 2)
+        k = math.floor((n - z * math.sqrt(n)) / 2)
+    if k < 1:
+        return None
+    ordered = sorted(values)
+    return ordered[k - 1], ordered[n - k]
+
+
+def relative_median_ci(values: List[float], confidence: float = 0.95) -> Optional[float]:
+    """
+    :return: Width of the median confidence interval, relative to the median
+    """
+    ci = median_ci(values, confidence)
+    if ci is None:
+        return None
+    median = statistics.median(values)
+    if median == 0:
+        return 0.0 if ci[0] == ci[1] else math.inf
+    return (ci[1] - ci[0]) / abs(median)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Percentile with the linear interpolation between the closest ranks
+
+    :param q: Percentile in the range [0, 100]
+    """
+    ordered = sorted(values)
+    if not ordered:
+        raise Exception('Percentile of the empty sequence')
+    position = (len(ordered) - 1) * q / 100.0
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Quantile of the Student's t-distribution.
+    Exact for 1 and 2 degrees of freedom, Cornish-Fisher expansion otherwise.
+    """
+    if df < 1:
+        raise Exception(f'Degrees of freedom must be positive, got {df}')
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) * math.sqrt(2 / (4 * p * (1 - p)))
+    z = statistics.NormalDist().inv_cdf(p)
+    v = df
+    return (z
+            + (z ** 3 + z) / (4 * v)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4))
+
+
+@dataclass
+class NestedStats:
+    """
+    Statistics of the measurements, grouped by the process launches
+    """
+    launches: int
+    # Mean of the launch means
+    mean: float
+    # Variance of the true launch means (launch-to-launch)
+    between_variance: float
+    # Variance of the iterations inside the launch
+    within_variance: float
+    # Confidence interval of the mean
+    ci_low: float
+    ci_high: float
+
+
+def nested_stats(groups: List[List[float]], confidence: float = 0.95) -> Optional[NestedStats]:
+    """
+    One-way random effects analysis of the iterations, grouped by launches.
+
+    Variance components are estimated by the method of moments. Confidence
+    interval of the mean is built from the launch means with `launches - 1`
+    degrees of freedom, since launches, not iterations, are independent.
+
+    :return: statistics, or None if there are less than two launches
+    """
+    groups = [list(group) for group in groups if len(group) > 0]
+    k = len(groups)
+    if k < 2:
+        return None
+
+    means = [statistics.mean(group) for group in groups]
+    mean = statistics.mean(means)
+
+    within_ss = sum(sum((x - m) ** 2 for x in group) for group, m in zip(groups, means))
+    within_df = sum(len(group) - 1 for group in groups)
+    within_variance = within_ss / within_df if within_df > 0 else 0.0
+
+    # Harmonic mean of the launch sizes for the unbalanced groups
+    n = k / sum(1 / len(group) for group in groups)
+    between_variance = max(0.0, statistics.variance(means) - within_variance / n)
+
+    half_width = t_quantile(1 - (1 - confidence) / 2, k - 1) * statistics.stdev(means) / math.sqrt(k)
+    return NestedStats(k, mean, between_variance, within_variance,
+                       mean - half_width, mean + half_width)
+
+
+def mser_truncation(values: List[float], batch: int = 5, max_fraction: float = 0.5) -> int:
+    """
+    Marginal standard error rule (MSER-m): the length of the initial transient.
+
+    Values are averaged in batches of `batch`, and the number of leading
+    batches `d` is chosen to minimize the marginal standard error of the
+    rest: sum((y_j - mean)^2) / (k - d)^2. Truncation is limited by
+    `max_fraction` of the batches, since the minimum at the very end of the
+    series is meaningless.
+
+    :return: Number of leading values to discard
+    """
+    k = len(values) // batch
+    if k < 2:
+        return 0
+    means = [statistics.mean(values[i * batch:(i + 1) * batch]) for i in range(k)]
+    best, best_d = math.inf, 0
+    for d in range(0, min(int(k * max_fraction), k - 2) + 1):
+        rest = means[d:]
+        mean = statistics.mean(rest)
+        error = sum((y - mean) ** 2 for y in rest) / len(rest) ** 2
+        if error < best:
+            best, best_d = error, d
+    return best_d * batch
@@ -0,0 +1,190 @@
+import csv
+import subprocess
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import lib.process as process
+import lib.util as util
+
+from lib.scheduler import Cell, abort_reason, aborted_result
+from drivers.driver import ExecutionResult
+
+
+TENANCY_FILE_NAME = 'tenancy.csv'
+
+
+def print_status(status: str, *args):
+    util.print_status('tenancy', status, *args)
+
+
+def tenants_variant(cell: Cell, tenants: int) -> str:
+    variant = f'tenants={tenants}'
+    return f'{cell.variant},{variant}' if cell.variant else variant
+
+
+@dataclass
+class TenancyResult:
+    """
+    Results of the tool instances, running concurrently on the same host
+    """
+    # Cells of the tenants: tenant `i` runs `cells[i % len(cells)]`
+    cells: List[Cell]
+    tenants: int
+    # Results of every cell, running alone
+    isolated: List[ExecutionResult]
+    # Results of every tenant
+    concurrent: List[ExecutionResult]
+    # Wall-clock time from the start of the first tenant to the finish of the last one
+    wall_time: float
+
+    def tenant_cell(self, tenant: int) -> Cell:
+        return self.cells[tenant % len(self.cells)]
+
+    def runs(self) -> int:
+        return sum(map(ExecutionResult.iterations, self.concurrent))
+
+    def runs_per_second(self) -> float:
+        return self.runs() / self.wall_time
+
+    def edges_per_second(self) -> float:
+        edges = sum(self.tenant_cell(i).dataset.get_edges() * result.iterations()
+                    for i, result in enumerate(self.concurrent))
+        return edges / self.wall_time
+
+    def isolated_runs_per_second(self) -> Optional[float]:
+        """
+        Throughput of the same cells, running one after another
+        """
+        wall_time = sum(result.wall_time or 0.0 for result in self.isolated)
+        if wall_time == 0:
+            return None
+        return sum(map(ExecutionResult.iterations, self.isolated)) / wall_time
+
+    def concurrent_result(self, index: int) -> ExecutionResult:
+        """
+        Merged result of all tenants, running the cell `index`
+        """
+        return ExecutionResult.merge(
+            [result for i, result in enumerate(self.concurrent) if i % len(self.cells) == index])
+
+    def inflation(self, index: int) -> float:
+        """
+        Median iteration time of the cell under contention, relative to the isolated one
+        """
+        return self.concurrent_result(index).median() / self.isolated[index].median()
+
+
+def groups(cells: Iterable[Cell], mix: bool) -> List[List[Cell]]:
+    """
+    Group the cells, running concurrently. Without the mix every cell
+    runs against its own copies, with the mix all algorithms of the same
+    tool and dataset run against each other.
+    """
+    if not mix:
+        return [[cell] for cell in cells]
+    grouped: Dict[Tuple[str, str, str], List[Cell]] = {}
+    for cell in cells:
+        key = (cell.dataset.name, str(cell.driver.tool_name()), cell.variant)
+        grouped.setdefault(key, []).append(cell)
+    return list(grouped.values())
+
+
+def _run_cell(cell: Cell) -> ExecutionResult:
+    """
+    :return: Result of the cell, partial one if the tool was aborted after some iterations
+    """
+    try:
+        with process.environment(cell.env), process.wrapper(cell.wrapper):
+            result = cell.driver.run(cell.dataset, cell.algo, cell.iterations)
+    except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+        result = aborted_result(str(cell), e)
+        if result is None:
+            raise
+    result.threads = cell.threads
+    return result
+
+
+def run_group(cells: List[Cell], tenants: int) -> TenancyResult:
+    """
+    Measure every cell alone, then launch `tenants` instances at once.
+    Tenants are not pinned: they compete for the cpus, memory bandwidth
+    and caches as independent jobs on the shared host do.
+    """
+    name = ' + '.join(map(str, cells))
+    for cell in cells:
+        cell.driver.ensure_built()
+
+    isolated = []
+    for cell in cells:
+        print_status(str(cell), 'isolated')
+        isolated.append(_run_cell(cell))
+
+    print_status(name, f'{tenants} tenants')
+    start = threading.Barrier(tenants)
+
+    def run_tenant(tenant: int) -> Tuple[ExecutionResult, float]:
+        start.wait()
+        result = _run_cell(cells[tenant % len(cells)])
+        return result, time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=tenants) as executor:
+        begin = time.perf_counter()
+        futures = [executor.submit(run_tenant, tenant) for tenant in range(tenants)]
+        finished = [future.result() for future in futures]
+
+    concurrent = [result for result, _ in finished]
+    wall_time = max(finish for _, finish in finished) - begin
+    return TenancyResult(cells, tenants, isolated, concurrent, wall_time)
+
+
+def run(cells: Iterable[Cell],
+        tenants: int,
+        mix: bool,
+        on_result: Callable[[TenancyResult], None]):
+    if tenants < 1:
+        raise Exception(f'Number of tenants must be positive, got {tenants}')
+    for group in groups(cells, mix):
+        try:
+            result = run_group(group, tenants)
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+            status, reason = abort_reason(e)
+            print_status(' + '.join(map(str, group)), status, f'{reason}, skipping')
+            continue
+        print_status(' + '.join(map(str, group)), 'finish',
+                     f'runs/s={result.runs_per_second():.2f}',
+                     f'edges/s={result.edges_per_second():.3g}')
+        on_result(result)
+
+
+def dump(results: List[TenancyResult], output: Path):
+    """
+    Dump throughput and latency inflation: one row per cell of every group
+    """
+    with (output / TENANCY_FILE_NAME).open('w') as tenancy_file:
+        csv_writer = csv.DictWriter(
+            tenancy_file, ['dataset', 'tool', 'variant', 'algo', 'tenants', 'mix',
+                           'isolated_median', 'concurrent_median', 'inflation',
+                           'runs_per_second', 'isolated_runs_per_second', 'edges_per_second'])
+        csv_writer.writeheader()
+        for result in results:
+            isolated_throughput = result.isolated_runs_per_second()
+            for index, cell in enumerate(result.cells):
+                csv_writer.writerow({
+                    'dataset': cell.dataset.name,
+                    'tool': str(cell.driver.tool_name()),
+                    'variant': cell.variant,
+                    'algo': str(cell.algo),
+                    'tenants': result.tenants,
+                    'mix': '+'.join(map(lambda c: str(c.algo), result.cells)),
+                    'isolated_median': f'{result.isolated[index].median():.3f}',
+                    'concurrent_median': f'{result.concurrent_result(index).median():.3f}',
+                    'inflation': f'{result.inflation(index):.3f}',
+                    'runs_per_second': f'{result.runs_per_second():.3f}',
+                    'isolated_runs_per_second': '' if isolated_throughput is None else f'{isolated_throughput:.3f}',
+                    'edges_per_second': f'{result.edges_per_second():.1f}'
+                })
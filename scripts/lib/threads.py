@@ -0,0 +1,31 @@
+from typing import Dict, List
+
+import config
+
+from lib.tool import ToolName
+
+
+def parse_threads(value: str) -> List[int]:
+    """
+    Parse thread counts of the sweep, for example `1,2,4,8`
+    """
+    threads = list(map(int, value.split(',')))
+    if not threads or min(threads) < 1:
+        raise ValueError(f'Thread counts must be positive: {value}')
+    return sorted(set(threads))
+
+
+def threads_env(tool: ToolName, threads: int) -> Dict[str, str]:
+    variables = config.THREADS_ENV + config.TOOL_CONFIG[tool].threads_env
+    return {variable: str(threads) for variable in variables}
+
+
+def threads_variant(threads: int) -> str:
+    return f'threads={threads}'
+
+
+def sweep_variant(variant: str) -> str:
+    """
+    :return: Variant without the number of threads: runs of the same sweep have the same one
+    """
+    return ','.join(part for part in variant.split(',') if part and not part.startswith('threads='))
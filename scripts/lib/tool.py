@@ -6,6 +6,7 @@ class ToolName(Enum):
     spla = 'spla'
     lagraph = 'lagraph'
     gunrock = 'gunrock'
+    scipy = 'scipy'
 
     def __str__(self):
         return self.value
@@ -0,0 +1,237 @@
+import tempfile
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import scipy.sparse.csgraph as csgraph
+except ImportError:
+    # SciPy is optional, see lib.reference
+    csgraph = None
+
+import config
+import lib.reference as reference
+import lib.util as util
+
+from lib.algorithm import AlgorithmName
+from lib.dataset import Dataset
+
+
+"""
+Offline verification of the tool results.
+
+Tools, which can save their output, write it to the file from `output_path()`
+after the measured iterations, as plain text with one value per line:
+levels of the vertices for bfs (-1 for the unreachable), distances for sssp
+(`inf` for the unreachable), the number of triangles for tc, component labels
+for cc and ranks for pagerank. The harness compares it with the reference,
+computed once per dataset (and source) and cached in `config.REFERENCES_FOLDER`.
+
+Where the benchmarked kernels of lib.reference can be checked independently,
+the reference does not use them: distances come from the csgraph shortest
+paths, triangles from the degree-oriented graph and components from the label
+propagation. Ranks come from the pagerank kernel, run to a much tighter
+tolerance than the tools. All references scale with the number of edges.
+"""
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def print_status(status: str, *args):
+    util.print_status('verification', status, *args)
+
+
+def output_path() -> Optional[Path]:
+    """
+    :return: File, where the tool launched by the calling thread must save its output, or None
+    """
+    return getattr(_local, 'output', None)
+
+
+@contextmanager
+def saving(enabled: bool) -> Iterator[Optional[Path]]:
+    """
+    Request the tools, launched by the calling thread inside this context, to save their output
+
+    :return: Path of the output file (None if not enabled)
+    """
+    if not enabled:
+        yield None
+        return
+    previous = output_path()
+    with tempfile.TemporaryDirectory(prefix='spla-bench-output-') as folder:
+        _local.output = Path(folder) / 'output.txt'
+        try:
+            yield _local.output
+        finally:
+            _local.output = previous
+
+
+def reference_path(dataset: Dataset, algo: AlgorithmName, source: int) -> Path:
+    name = f'{dataset.name}.{algo}'
+    if algo in (AlgorithmName.bfs, AlgorithmName.sssp):
+        name += f'.source-{source}'
+    elif algo == AlgorithmName.pagerank:
+        name += f'.d-{config.PAGERANK.damping}.t-{config.VERIFICATION.pagerank_tolerance}'
+    return config.REFERENCES_FOLDER / f'{name}.npy'
+
+
+def expected_levels(matrix, source: int):
+    hops = csgraph.shortest_path(matrix, method='D', directed=True, unweighted=True, indices=source)
+    levels = reference.np.full(len(hops), reference.UNVISITED, dtype=reference.np.int64)
+    reachable = reference.np.isfinite(hops)
+    levels[reachable] = hops[reachable]
+    return levels
+
+
+def expected_triangles(matrix) -> int:
+    """
+    Triangles of the symmetric pattern without loops. Edges are oriented from
+    the lower to the higher (degree, vertex) rank, so every triangle is the
+    common out-neighbour of the ends of exactly one oriented edge. Out-rows
+    of both ends of every edge are merged, and the vertices met twice are
+    counted, chunk by chunk.
+    """
+    np = reference.np
+    n = matrix.shape[0]
+    coo = matrix.tocoo()
+    loops = coo.row == coo.col
+    rows = np.concatenate([coo.row[~loops], coo.col[~loops]]).astype(np.int64)
+    columns = np.concatenate([coo.col[~loops], coo.row[~loops]]).astype(np.int64)
+    keys = np.unique(rows * n + columns)
+    rows, columns = keys // n, keys % n
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), np.bincount(rows, minlength=n)))] = np.arange(n)
+    forward = rank[rows] < rank[columns]
+    rows, columns = rows[forward], columns[forward]
+    oriented = reference.sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(n, n))
+    out_degree = np.diff(oriented.indptr)
+    triangles = 0
+    for part in reference.chunks(out_degree[rows] + out_degree[columns]):
+        first, _, first_edge = reference.gather_rows(oriented, rows[part])
+        second, _, second_edge = reference.gather_rows(oriented, columns[part])
+        _, counts = np.unique(np.concatenate([first_edge * n + first, second_edge * n + second]),
+                              return_counts=True)
+        triangles += int(np.count_nonzero(counts == 2))
+    return triangles
+
+
+def expected_components(matrix):
+    """
+    Label propagation over the undirected edges: every vertex takes the
+    smallest label of its neighbours, pointer jumping shortens the chains
+    """
+    np = reference.np
+    coo = matrix.tocoo()
+    rows = np.concatenate([coo.row, coo.col])
+    columns = np.concatenate([coo.col, coo.row])
+    labels = np.arange(matrix.shape[0])
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, rows, labels[columns])
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def expected_ranks(matrix, damping: float):
+    """
+    Power iteration to the tight `config.VERIFICATION` tolerance: the tools
+    stop at `config.PAGERANK.tolerance`, far before the reference does
+    """
+    verification = config.VERIFICATION
+    ranks, _ = reference.pagerank(*reference.pagerank_matrix(matrix), damping,
+                                  verification.pagerank_tolerance, verification.pagerank_max_iterations)
+    return ranks
+
+
+def compute_reference(dataset: Dataset, algo: AlgorithmName, source: int):
+    matrix = reference.build(reference.read(dataset.path))
+    if algo == AlgorithmName.bfs:
+        return expected_levels(matrix, source)
+    if algo == AlgorithmName.sssp:
+        return csgraph.dijkstra(matrix, directed=True, indices=source)
+    if algo == AlgorithmName.tc:
+        return reference.np.array([expected_triangles(matrix)])
+    if algo == AlgorithmName.cc:
+        return expected_components(matrix)
+    if algo == AlgorithmName.pagerank:
+        return expected_ranks(matrix, config.PAGERANK.damping)
+    raise Exception(f'Unknown algorithm {algo}')
+
+
+def get_reference(dataset: Dataset, algo: AlgorithmName, source: int):
+    """
+    :return: Cached reference result, computed on the first request
+    """
+    path = reference_path(dataset, algo, source)
+    with _lock:
+        if not path.exists():
+            print_status(f'{dataset.name} {algo}', 'computing reference')
+            result = compute_reference(dataset, algo, source)
+            config.REFERENCES_FOLDER.mkdir(parents=True, exist_ok=True)
+            reference.np.save(path, result)
+        return reference.np.load(path)
+
+
+def canonical_components(labels):
+    """
+    :return: Labels, replaced by the smallest vertex of their component
+    """
+    np = reference.np
+    _, inverse = np.unique(labels, return_inverse=True)
+    smallest = np.full(inverse.max() + 1, len(labels))
+    np.minimum.at(smallest, inverse, np.arange(len(labels)))
+    return smallest[inverse]
+
+
+def compare(algo: AlgorithmName, expected, actual) -> Optional[str]:
+    """
+    :return: Description of the mismatch, or None if the output is correct
+    """
+    np = reference.np
+    if len(actual) != len(expected):
+        return f'{len(actual)} values, expected {len(expected)}'
+    if algo == AlgorithmName.bfs or algo == AlgorithmName.tc:
+        wrong = np.count_nonzero(actual.astype(np.int64) != expected)
+    elif algo == AlgorithmName.sssp:
+        wrong = np.count_nonzero(~np.isclose(actual, expected, rtol=config.VERIFICATION.rtol))
+    elif algo == AlgorithmName.cc:
+        wrong = np.count_nonzero(canonical_components(actual) != canonical_components(expected))
+    elif algo == AlgorithmName.pagerank:
+        distance = np.abs(actual / actual.sum() - expected).sum()
+        if distance > config.VERIFICATION.pagerank_l1:
+            return f'L1 distance of the ranks {distance:.3g} > {config.VERIFICATION.pagerank_l1}'
+        return None
+    else:
+        raise Exception(f'Unknown algorithm {algo}')
+    return f'{wrong} wrong values' if wrong else None
+
+
+def verify(tool: str,
+           dataset: Dataset,
+           algo: AlgorithmName,
+           source: int,
+           output: Path) -> Optional[bool]:
+    """
+    :return: Whether the saved output matches the reference, None if it could not be checked
+    """
+    name = f'{tool} {dataset.name} {algo}'
+    if not output.exists():
+        print_status(name, 'skipped', 'tool did not save its output')
+        return None
+    if not reference.available():
+        print_status(name, 'skipped', 'SciPy is required to compute the reference')
+        return None
+    expected = get_reference(dataset, algo, source)
+    actual = reference.np.loadtxt(output, ndmin=1)
+    mismatch = compare(algo, expected, actual)
+    if mismatch is not None:
+        print_status(name, 'wrong result', mismatch)
+        return False
+    print_status(name, 'correct')
+    return True
@@ -0,0 +1,391 @@
+import itertools
+import json
+import queue
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import config
+import lib.affinity as affinity
+import lib.util as util
+
+from lib.algorithm import AlgorithmName
+from lib.dataset import Dataset
+from lib.scheduler import Cell, Scheduler, aborted_result
+from lib.tool import ToolName
+from drivers.driver import ExecutionResult
+from drivers.registry import get_driver
+
+
+QUEUE_FILE_NAME = 'queue.json'
+
+# Worker is considered dead, if it has not reported the job for this number of seconds
+LEASE_TIME = 60.0
+HEARTBEAT_TIME = 10.0
+# Job is dropped after this number of failed or abandoned attempts
+MAX_ATTEMPTS = 3
+# Delay of the worker before the next claim, when all jobs are taken
+POLL_TIME = 1.0
+
+
+def print_status(status: str, *args):
+    util.print_status('work queue', status, *args)
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """
+    Parse `host:port` address, host is `localhost` if omitted
+    """
+    host, _, port = value.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def cell_to_json(cell: Cell) -> Dict:
+    return {
+        'dataset': cell.dataset.name,
+        'algo': str(cell.algo),
+        'tool': str(cell.driver.tool_name()),
+        'cores': cell.cores,
+        'variant': cell.variant,
+        'env': cell.env,
+        'wrapper': cell.wrapper,
+        'threads': cell.threads,
+        'iterations': cell.iterations
+    }
+
+
+def cell_from_json(data: Dict) -> Cell:
+    return Cell(
+        dataset=Dataset(data['dataset']),
+        algo=AlgorithmName(data['algo']),
+        driver=get_driver(ToolName(data['tool'])),
+        cores=data['cores'],
+        variant=data['variant'],
+        env=data['env'],
+        wrapper=data.get('wrapper', []),
+        threads=data['threads'],
+        iterations=data['iterations'])
+
+
+def save_cells(output: Path, cells: List[Cell]):
+    with (output / QUEUE_FILE_NAME).open('w') as queue_file:
+        json.dump(list(map(cell_to_json, cells)), queue_file, indent=2)
+
+
+def load_cells(output: Path) -> Optional[List[Cell]]:
+    """
+    :return: Cells of the saved queue, or None if the queue was not saved
+    """
+    path = output / QUEUE_FILE_NAME
+    if not path.exists():
+        return None
+    with path.open('r') as queue_file:
+        return list(map(cell_from_json, json.load(queue_file)))
+
+
+def settings() -> Dict:
+    """
+    Mutable configuration of the campaign, which the workers must use
+    """
+    return {
+        'adaptive': vars(config.ADAPTIVE),
+        'limits': vars(config.LIMITS),
+        'workload': vars(config.WORKLOAD),
+        'source_policy': config.SOURCE_POLICY.value,
+        'warm_up': {**vars(config.WARM_UP), 'policy': config.WARM_UP.policy.value},
+        'launches': config.LAUNCHES,
+        'calibration': vars(config.CALIBRATION),
+        'cache_mode': config.CACHE_MODE.value,
+        'pagerank': vars(config.PAGERANK),
+        'verification': vars(config.VERIFICATION),
+        'conversion': vars(config.CONVERSION)
+    }
+
+
+def apply_settings(data: Dict):
+    vars(config.ADAPTIVE).update(data['adaptive'])
+    vars(config.LIMITS).update(data['limits'])
+    vars(config.WORKLOAD).update(data['workload'])
+    config.SOURCE_POLICY = config.SourcePolicy(data['source_policy'])
+    vars(config.WARM_UP).update(data['warm_up'])
+    config.WARM_UP.policy = config.WarmUpPolicy(data['warm_up']['policy'])
+    config.LAUNCHES = data['launches']
+    vars(config.CALIBRATION).update(data['calibration'])
+    config.CACHE_MODE = config.CacheMode(data['cache_mode'])
+    vars(config.PAGERANK).update(data['pagerank'])
+    vars(config.VERIFICATION).update(data['verification'])
+    vars(config.CONVERSION).update(data['conversion'])
+
+
+@dataclass
+class Claim:
+    connection: int
+    expires: float
+
+
+class JobQueue:
+    """
+    Jobs of the campaign and their claims by the workers.
+
+    Job is claimed by one worker connection at a time. It returns to the
+    queue, if the connection is lost or the worker has not reported for
+    `LEASE_TIME` seconds, and is dropped after `MAX_ATTEMPTS` attempts.
+    """
+
+    def __init__(self, cells: Iterable[Cell], on_drop: Optional[Callable[[int], None]] = None):
+        self.cells: Dict[int, Cell] = dict(enumerate(cells))
+        self.on_drop = on_drop
+        self.pending: Deque[int] = deque(self.cells.keys())
+        self.claims: Dict[int, Claim] = {}
+        self.attempts: Dict[int, int] = {job: 0 for job in self.cells}
+        self.finished: set = set()
+        self.lock = threading.Lock()
+
+    def done(self) -> bool:
+        with self.lock:
+            return len(self.finished) == len(self.cells)
+
+    def claim(self, connection: int) -> Optional[int]:
+        with self.lock:
+            self._expire()
+            if not self.pending:
+                return None
+            job = self.pending.popleft()
+            self.attempts[job] += 1
+            self.claims[job] = Claim(connection, time.monotonic() + LEASE_TIME)
+            return job
+
+    def heartbeat(self, job: int, connection: int):
+        with self.lock:
+            claim = self.claims.get(job)
+            if claim is not None and claim.connection == connection:
+                claim.expires = time.monotonic() + LEASE_TIME
+
+    def complete(self, job: int) -> bool:
+        """
+        :return: True if the job was not finished yet (late results of the requeued job are accepted once)
+        """
+        with self.lock:
+            if job in self.finished:
+                return False
+            self.claims.pop(job, None)
+            if job in self.pending:
+                self.pending.remove(job)
+            self.finished.add(job)
+            return True
+
+    def fail(self, job: int, connection: int, reason: str):
+        with self.lock:
+            claim = self.claims.get(job)
+            if claim is not None and claim.connection == connection:
+                self._requeue(job, reason)
+
+    def release(self, connection: int):
+        """
+        Requeue all jobs of the lost connection
+        """
+        with self.lock:
+            for job, claim in list(self.claims.items()):
+                if claim.connection == connection:
+                    self._requeue(job, 'worker disconnected')
+
+    def expire(self):
+        with self.lock:
+            self._expire()
+
+    def _expire(self):
+        now = time.monotonic()
+        for job, claim in list(self.claims.items()):
+            if claim.expires < now:
+                self._requeue(job, 'lease expired')
+
+    def _requeue(self, job: int, reason: str):
+        del self.claims[job]
+        if self.attempts[job] >= MAX_ATTEMPTS:
+            print_status(str(self.cells[job]), 'dropped', f'{reason}, {self.attempts[job]} attempts')
+            self.finished.add(job)
+            if self.on_drop is not None:
+                self.on_drop(job)
+            return
+        print_status(str(self.cells[job]), 'requeued', reason)
+        self.pending.appendleft(job)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+    Serves one worker connection: newline-delimited JSON requests and responses
+    """
+    server: '_Server'
+
+    def handle(self):
+        connection = next(self.server.connections)
+        name = f'{self.client_address[0]}:{self.client_address[1]}'
+        print_status(f'worker {name}', 'connected')
+        try:
+            for line in self.rfile:
+                response = self.server.coordinator.handle(json.loads(line), connection)
+                self.wfile.write((json.dumps(response) + '\n').encode())
+                self.wfile.flush()
+        except (ConnectionError, ValueError) as e:
+            print_status(f'worker {name}', 'connection error', e)
+        finally:
+            print_status(f'worker {name}', 'disconnected')
+            self.server.coordinator.queue.release(connection)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], coordinator: 'Coordinator'):
+        self.coordinator = coordinator
+        self.connections = itertools.count()
+        super().__init__(address, _Handler)
+
+
+class Coordinator:
+    """
+    Serves the benchmark cells to the workers over TCP and collects their results.
+
+    Results are reported from the calling thread only.
+    """
+
+    def __init__(self, address: Tuple[str, int]):
+        self.address = address
+        self.queue: Optional[JobQueue] = None
+        self.results: queue.Queue = queue.Queue()
+
+    def handle(self, request: Dict, connection: int) -> Dict:
+        op = request['op']
+        if op == 'claim':
+            job = self.queue.claim(connection)
+            if job is not None:
+                return {'job': job, 'cell': cell_to_json(self.queue.cells[job]), 'settings': settings()}
+            if self.queue.done():
+                return {'finished': True}
+            return {'wait': POLL_TIME}
+        if op == 'heartbeat':
+            self.queue.heartbeat(request['job'], connection)
+        elif op == 'result':
+            if self.queue.complete(request['job']):
+                self.results.put((request['job'], ExecutionResult.from_json(request['result'])))
+        elif op == 'skip':
+            # Job is not repeated: the same tool is killed by the same limits again
+            if self.queue.complete(request['job']):
+                self.results.put((request['job'], None))
+        elif op == 'fail':
+            self.queue.fail(request['job'], connection, request['error'])
+        else:
+            return {'error': f'Unknown operation {op}'}
+        return {'ok': True}
+
+    def run(self,
+            cells: Iterable[Cell],
+            on_result: Callable[[Cell, ExecutionResult], None],
+            on_skip: Optional[Callable[[Cell], None]] = None):
+        # Dropped jobs are reported as skipped, from the calling thread too
+        self.queue = JobQueue(cells, lambda job: self.results.put((job, None)))
+        server = _Server(self.address, self)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        print_status('coordinator', f'serving {len(self.queue.cells)} jobs',
+                     f'on {self.address[0]}:{server.server_address[1]}')
+        try:
+            while not self.queue.done() or not self.results.empty():
+                try:
+                    job, result = self.results.get(timeout=POLL_TIME)
+                except queue.Empty:
+                    self.queue.expire()
+                    continue
+                cell = self.queue.cells[job]
+                if result is None:
+                    print_status(str(cell), 'no result, skipping')
+                    if on_skip is not None:
+                        on_skip(cell)
+                    continue
+                print_status(str(cell), 'finish')
+                on_result(cell, result)
+        finally:
+            # Workers waiting for the next claim get `finished` until the server stops
+            time.sleep(POLL_TIME)
+            server.shutdown()
+            server.server_close()
+
+
+class Worker:
+    """
+    Claims the jobs of the coordinator and runs them through the drivers,
+    one job at a time on all cpus of the worker.
+    """
+
+    def __init__(self, address: Tuple[str, int]):
+        self.address = address
+        self.lock = threading.Lock()
+        self.stream = None
+
+    def request(self, data: Dict) -> Dict:
+        with self.lock:
+            self.stream.write((json.dumps(data) + '\n').encode())
+            self.stream.flush()
+            line = self.stream.readline()
+        if not line:
+            raise ConnectionError('Coordinator closed the connection')
+        return json.loads(line)
+
+    def run(self):
+        with socket.create_connection(self.address) as connection:
+            self.stream = connection.makefile('rwb')
+            print_status('worker', f'connected to {self.address[0]}:{self.address[1]}')
+            while True:
+                response = self.request({'op': 'claim'})
+                if response.get('finished'):
+                    print_status('worker', 'all jobs are finished')
+                    return
+                if 'wait' in response:
+                    time.sleep(response['wait'])
+                    continue
+                self.run_job(response['job'], response['cell'], response['settings'])
+
+    def run_job(self, job: int, cell_data: Dict, settings_data: Dict):
+        apply_settings(settings_data)
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(HEARTBEAT_TIME):
+                self.request({'op': 'heartbeat', 'job': job})
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        try:
+            cell = cell_from_json(cell_data)
+            cell.driver.ensure_built()
+            heartbeat_thread.start()
+            print_status('worker', 'start', str(cell))
+            cpus = affinity.available_cpus()
+            result = Scheduler._run_cell(cell, cpus[:Scheduler(cpus=cpus).cores_required(cell)])
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+            # Not requeued: the same tool is killed by the same limits or crashes again
+            stop.set()
+            partial = aborted_result(str(cell), e)
+            if partial is None:
+                self.request({'op': 'skip', 'job': job})
+            else:
+                partial.threads = cell.threads
+                self.request({'op': 'result', 'job': job, 'result': partial.to_json()})
+            return
+        except Exception as e:
+            stop.set()
+            print_status('worker', 'failed', repr(e))
+            self.request({'op': 'fail', 'job': job, 'error': repr(e)})
+            return
+        finally:
+            stop.set()
+            if heartbeat_thread.is_alive():
+                heartbeat_thread.join()
+        self.request({'op': 'result', 'job': job, 'result': result.to_json()})
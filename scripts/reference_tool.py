@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import time
+
+from pathlib import Path
+
+import config
+import lib.reference as reference
+
+from lib.algorithm import AlgorithmName
+
+
+"""
+Reference tool: benchmark executable of the SciPy implementations.
+It is launched by the `scipy` driver as any other tool and prints:
+
+read time(ms): <ms>
+build time(ms): <ms>
+warm-up(ms): <ms>
+pagerank iterations: <n> (pagerank only: iterations until convergence)
+iteration(ms): <ms>      (one line per iteration, as soon as it finishes)
+"""
+
+
+def print_line(line: str):
+    print(line, flush=True)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def save_output(path: Path, algo: AlgorithmName, result):
+    if algo == AlgorithmName.tc:
+        result = [result]
+    elif algo == AlgorithmName.pagerank:
+        result, _ = result
+    integer = algo in (AlgorithmName.bfs, AlgorithmName.tc, AlgorithmName.cc)
+    reference.np.savetxt(path, result, fmt='%d' if integer else '%.17g')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser('SciPy reference implementations of the benchmark algorithms')
+    arg_parser.add_argument('algo',
+                            type=AlgorithmName,
+                            choices=list(AlgorithmName))
+    arg_parser.add_argument('path',
+                            type=Path,
+                            help='Matrix Market file of the graph')
+    arg_parser.add_argument('--source',
+                            type=int,
+                            default=0,
+                            help='Source vertex of the traversal (0-based)')
+    arg_parser.add_argument('--niters',
+                            type=int,
+                            default=1,
+                            help='Number of measured iterations')
+    arg_parser.add_argument('--damping',
+                            type=float,
+                            default=config.PAGERANK.damping,
+                            help='Damping factor of pagerank')
+    arg_parser.add_argument('--tolerance',
+                            type=float,
+                            default=config.PAGERANK.tolerance,
+                            help='Pagerank stops when the rank of every vertex (ranks sum up to 1) changes by less than it')
+    arg_parser.add_argument('--max-iterations',
+                            type=int,
+                            default=config.PAGERANK.max_iterations,
+                            help='Maximal number of pagerank iterations')
+    arg_parser.add_argument('--output',
+                            type=Path,
+                            help='Save the result of the last iteration (see lib.verification for the format)')
+    args = arg_parser.parse_args()
+
+    try:
+        reference.require()
+    except Exception as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    coo, read_time = timed(reference.read, args.path)
+    print_line(f'read time(ms): {read_time:.3f}')
+    matrix, build_time = timed(reference.build, coo)
+    if args.algo == AlgorithmName.tc:
+        matrix, lower_time = timed(reference.lower_triangle, matrix)
+        build_time += lower_time
+    if args.algo == AlgorithmName.pagerank:
+        (transposed, out_degree), pagerank_time = timed(reference.pagerank_matrix, matrix)
+        build_time += pagerank_time
+    print_line(f'build time(ms): {build_time:.3f}')
+
+    kernel, kernel_args = {
+        AlgorithmName.bfs: (reference.bfs, (matrix, args.source)),
+        AlgorithmName.sssp: (reference.sssp, (matrix, args.source)),
+        AlgorithmName.tc: (reference.tc, (matrix,)),
+        AlgorithmName.cc: (reference.cc, (matrix,)),
+        AlgorithmName.pagerank: (lambda: reference.pagerank(
+            transposed, out_degree, args.damping, args.tolerance, args.max_iterations), ())
+    }[args.algo]
+
+    result, warm_up = timed(kernel, *kernel_args)
+    print_line(f'warm-up(ms): {warm_up:.3f}')
+    if args.algo == AlgorithmName.pagerank:
+        print_line(f'pagerank iterations: {result[1]}')
+    for _ in range(args.niters):
+        result, iteration = timed(kernel, *kernel_args)
+        print_line(f'iteration(ms): {iteration:.3f}')
+
+    if args.output is not None:
+        save_output(args.output, args.algo, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+import argparse
+
+import lib.page_cache as page_cache
+
+from lib.workqueue import Worker, parse_address
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Worker agent: runs benchmark jobs of the coordinator (benchmark.py --serve)')
+
+    parser.add_argument('address',
+                        type=parse_address,
+                        metavar='HOST:PORT',
+                        help='Address of the coordinator')
+
+    args = parser.parse_args()
+
+    try:
+        Worker(args.address).run()
+    finally:
+        page_cache.remove_staged()
+
+
+if __name__ == '__main__':
+    main()